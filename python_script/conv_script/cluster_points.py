@@ -0,0 +1,130 @@
+#!/bin/python3
+import math
+
+from geojson_to_mvt import world_xy
+from publish import write_json, report
+from spatial_index import parse_coordinate
+
+RADIUS = 40          # rayon de regroupement en pixels écran
+TILE_SIZE = 512
+MIN_ZOOM = 0
+MAX_ZOOM = 16        # au-delà, tous les points sont affichés tels quels
+OUTPUT_FILE = "../../public/json_files/event_clusters.json"
+
+
+class Node:
+    __slots__ = ("x", "y", "count", "index", "children", "start", "end")
+
+    def __init__(self, x: float, y: float, count: int = 1, index: int | None = None, children: list | None = None):
+        self.x = x
+        self.y = y
+        self.count = count
+        self.index = index          # indice de l'événement pour une feuille
+        self.children = children    # noeuds regroupés pour un cluster
+        self.start = self.end = 0
+
+
+def unproject(x: float, y: float) -> tuple:
+    lon = x * 360 - 180
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lon, lat
+
+
+def cluster_level(nodes: list, zoom: int, radius: float = RADIUS) -> list:
+    """
+    Un niveau de regroupement glouton façon supercluster : chaque noeud non
+    encore pris absorbe ses voisins à moins de radius pixels à ce zoom. Les
+    voisins sont cherchés dans une grille de cases de la taille du rayon.
+    """
+    r = radius / (TILE_SIZE * (1 << zoom))
+    grid = {}
+    for i, node in enumerate(nodes):
+        grid.setdefault((int(node.x // r), int(node.y // r)), []).append(i)
+    used = [False] * len(nodes)
+    result = []
+    for i, node in enumerate(nodes):
+        if used[i]:
+            continue
+        used[i] = True
+        members = [node]
+        cx, cy = int(node.x // r), int(node.y // r)
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for j in grid.get((gx, gy), ()):
+                    other = nodes[j]
+                    if not used[j] and (other.x - node.x) ** 2 + (other.y - node.y) ** 2 <= r * r:
+                        used[j] = True
+                        members.append(other)
+        if len(members) == 1:
+            result.append(node)
+            continue
+        count = sum(m.count for m in members)
+        result.append(Node(sum(m.x * m.count for m in members) / count,
+                           sum(m.y * m.count for m in members) / count,
+                           count, children=members))
+    return result
+
+
+def _number_leaves(roots: list) -> list:
+    """Numérote les feuilles en profondeur : les feuilles d'un cluster forment un intervalle [start, end[."""
+    order = []
+    stack = [(node, False) for node in reversed(roots)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            node.end = len(order)
+        elif node.children is None:
+            node.start = len(order)
+            order.append(node.index)
+            node.end = len(order)
+        else:
+            node.start = len(order)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+    return order
+
+
+def build_clusters(points: list, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM, radius: float = RADIUS) -> dict:
+    """points : (indice, lon, lat). Retourne l'ordre des feuilles et les clusters de chaque zoom."""
+    nodes = [Node(*world_xy(lon, lat), index=index) for index, lon, lat in points]
+    levels = {}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        nodes = cluster_level(nodes, zoom, radius)
+        levels[zoom] = nodes
+    order = _number_leaves(levels[min_zoom])
+    zooms = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        rows = []
+        for node in levels[zoom]:
+            lon, lat = unproject(node.x, node.y)
+            rows.append([round(lon, 6), round(lat, 6), node.count, node.start, node.end])
+        zooms[str(zoom)] = rows
+    return {"min_zoom": min_zoom, "max_zoom": max_zoom, "radius": radius, "order": order, "zooms": zooms}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Précalcule les clusters de points de chaque zoom")
+    parser.add_argument("file", help="événements avec latitude/longitude (event_with_coordinates.json)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("-r", "--radius", type=float, default=RADIUS, help="rayon en pixels")
+    parser.add_argument("-z", "--zooms", default=f"{MIN_ZOOM}-{MAX_ZOOM}", help="plage de zooms, ex. 0-16")
+    args = parser.parse_args()
+
+    with open(args.file, mode="r", encoding="utf-8") as fd:
+        events = json.load(fd)
+    points = []
+    for i, event in enumerate(events):
+        lat = parse_coordinate(event.get("latitude"))
+        lon = parse_coordinate(event.get("longitude"))
+        if lat is not None and lon is not None:
+            points.append((i, lon, lat))
+
+    min_zoom, max_zoom = map(int, args.zooms.split("-"))
+    clusters = build_clusters(points, min_zoom, max_zoom, args.radius)
+    for zoom, rows in clusters["zooms"].items():
+        print(f"z{zoom:<2} : {len(rows):6} points affichés")
+    # les coordonnées sont déjà arrondies, publish ne fait que minifier et compresser
+    report(args.output, write_json(args.output, clusters, precision=None))
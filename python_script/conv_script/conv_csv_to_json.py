@@ -1,15 +1,18 @@
 #!/bin/python3
 from sys import argv
 import csv
-import json
+from geojson_writer import GeoJsonWriter
+from publish import JSON_DIR, output_path, pop_output_dir
 
-if len(argv) != 2:
+pretty = "--pretty" in argv
+args = [arg for arg in argv[1:] if arg != "--pretty"]
+output_dir = pop_output_dir(args, JSON_DIR)  # -o DOSSIER, public/ par défaut
+if len(args) != 1:
     exit(84)
 
-file_name = argv[1]
+file_name = args[0]
 
 def csv_to_json(file_name):
-    points = []
     with open(file_name, mode='r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
         for row in reader:
@@ -30,13 +33,12 @@ def csv_to_json(file_name):
                 point["name"]["it"] = row["nameIt"]
             if row["nameEs"]:
                 point["name"]["es"] = row["nameEs"]
-            points.append(point)
-    return {"points": points}
+            yield point
 
-json_data = csv_to_json(file_name)
-output_file = file_name.split('.')[0] + ".json"
+output_file = output_path(file_name, ".json", output_dir)
 
-with open(output_file, mode='w', encoding='utf-8') as json_file:
-    json.dump(json_data, json_file, indent=4, ensure_ascii=False)
+with GeoJsonWriter(output_file, pretty=pretty, key="points", header={}) as writer:
+    for point in csv_to_json(file_name):
+        writer.write(point)
 
 print(f"Fichier JSON généré : {output_file}")
@@ -1,27 +1,27 @@
 #!/bin/python3x
 
-import json5
 from sys import argv
-import json
-from bs4 import BeautifulSoup
+from geojson_writer import GeoJsonWriter
+from publish import GEOJSON_DIR, output_path, pop_output_dir
+from json5_cache import load_json5, strip_html
 
-if len(argv) != 2:
+pretty = "--pretty" in argv
+args = [arg for arg in argv[1:] if arg != "--pretty"]
+output_dir = pop_output_dir(args, GEOJSON_DIR)  # -o DOSSIER, public/ par défaut
+if len(args) != 1:
     exit(84)
 
-file_name = argv[1]
+file_name = args[0]
 
-with open(file_name, mode="r", encoding="utf-8") as file:
-    content = file.read()
-data = json5.loads(content)
+data = load_json5(file_name)
 
 print("File loaded !")
-features = []
-with open(file_name, mode="r", encoding="utf-8") as file:
+
+def data_to_features(data):
     for d in data:
         if d["Texte"]:
-            soup = BeautifulSoup(d["Texte"])
-            d["Texte"] = soup.get_text()
-        feature = {
+            d["Texte"] = strip_html(d["Texte"])
+        yield {
             "type": "Feature",
             "geometry": {
                 "type": "Point",
@@ -38,13 +38,9 @@ with open(file_name, mode="r", encoding="utf-8") as file:
                 "testament": "EC",
             }
         }
-        features.append(feature)
-    end_geojson = {
-        "type": "FeatureCollection",
-        "features": features
-    }
 
-output_file = file_name.split('.')[0] + ".geojson"
-with open(output_file, mode="w", encoding="utf-8") as file:
-    json.dump(end_geojson, file, indent=4, ensure_ascii=False)
+output_file = output_path(file_name, ".geojson", output_dir)
+with GeoJsonWriter(output_file, pretty=pretty) as writer:
+    for feature in data_to_features(data):
+        writer.write(feature)
 print(f"Fichier geoJSON généré : {output_file}")
@@ -1,9 +1,51 @@
 from PIL import Image
+import os
+import warnings
 import rasterio
+from rasterio.enums import ColorInterp
+from rasterio.errors import NotGeoreferencedWarning, RasterioIOError
+from rasterio.shutil import copy as copy_dataset
 from rasterio.transform import from_bounds
+from rasterio.windows import Window
 import numpy as np
 
-def webp_to_geotiff(webp_path, tif_path, bounds, crs='EPSG:4326'):
+BLOCK_SIZE = 512
+MEMORY_MB = 256  # cache GDAL pendant l'écriture et le calcul des overviews
+
+# les cartes anciennes dépassent la limite anti "decompression bomb" de Pillow
+Image.MAX_IMAGE_PIXELS = None
+
+
+def _open_image(path):
+    """
+    Source lue fenêtre par fenêtre : via rasterio quand GDAL sait lire le
+    format par blocs (TIFF, PNG, JPEG...), via Pillow sinon. Le WebP ne se
+    décode pas par morceaux : l'image décodée est gardée une fois, mais sans
+    copie numpy complète ni transposition.
+    """
+    if not path.lower().endswith(".webp"):
+        try:
+            with warnings.catch_warnings():
+                # une image source n'a pas encore de géoréférencement
+                warnings.simplefilter("ignore", NotGeoreferencedWarning)
+                src = rasterio.open(path)
+            return src.width, src.height, src.count, src.dtypes[0], \
+                lambda w: src.read(window=w), src.close
+        except RasterioIOError:
+            pass
+    img = Image.open(path)
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGBA")
+    count = len(img.getbands())
+
+    def read(w):
+        block = np.asarray(img.crop((w.col_off, w.row_off, w.col_off + w.width, w.row_off + w.height)))
+        return block[np.newaxis, :, :] if count == 1 else np.moveaxis(block, -1, 0)
+    return img.size[0], img.size[1], count, "uint8", read, img.close
+
+
+def webp_to_geotiff(webp_path, tif_path, bounds, crs='EPSG:4326', cog=True,
+                    block_size=BLOCK_SIZE, memory_mb=MEMORY_MB):
     """
     Convertit un fichier WebP en GeoTIFF avec des coordonnées géographiques.
     Args:
@@ -11,45 +53,61 @@ def webp_to_geotiff(webp_path, tif_path, bounds, crs='EPSG:4326'):
         tif_path: chemin de sortie pour le GeoTIFF
         bounds: tuple (left, bottom, right, top) avec les coordonnées
         crs: système de coordonnées (par défaut WGS84)
+        cog: Cloud-Optimized GeoTIFF (tuilé, avec overviews) si True
+        block_size: taille des tuiles internes et des fenêtres écrites
+        memory_mb: budget du cache GDAL
     """
-    # Ouvrir l'image WebP
-    img = Image.open(webp_path)
-    img_array = np.array(img)
-    if len(img_array.shape) == 2:
-        count = 1
-        img_array = img_array[np.newaxis, :, :]
-    else:
-        count = img_array.shape[2]
-        img_array = np.transpose(img_array, (2, 0, 1))
-    height, width = img.size[1], img.size[0]
-    transform = from_bounds(bounds[0], bounds[1], bounds[2], bounds[3], 
-                           width, height)
-    with rasterio.open(
-        tif_path,
-        'w',
+    width, height, count, dtype, read, close = _open_image(webp_path)
+    transform = from_bounds(bounds[0], bounds[1], bounds[2], bounds[3], width, height)
+    tiled_path = tif_path + ".tmp.tif" if cog else tif_path
+    profile = dict(
         driver='GTiff',
         height=height,
         width=width,
         count=count,
-        dtype=img_array.dtype,
+        dtype=dtype,
         crs=crs,
         transform=transform,
-        compress='lzw' # compression optionnelle
-    ) as dst:
-        dst.write(img_array)
+        tiled=True,
+        blockxsize=block_size,
+        blockysize=block_size,
+        compress='lzw',
+        BIGTIFF='IF_SAFER',
+    )
+    if count >= 3:
+        profile["photometric"] = "RGB"
+    try:
+        with rasterio.Env(GDAL_CACHEMAX=memory_mb):
+            with rasterio.open(tiled_path, 'w', **profile) as dst:
+                if count == 4:
+                    dst.colorinterp = [ColorInterp.red, ColorInterp.green, ColorInterp.blue, ColorInterp.alpha]
+                # une fenêtre à la fois : la mémoire ne dépend pas de la taille de l'image
+                for row in range(0, height, block_size):
+                    for col in range(0, width, block_size):
+                        window = Window(col, row, min(block_size, width - col), min(block_size, height - row))
+                        dst.write(read(window), window=window)
+            if cog:
+                copy_dataset(tiled_path, tif_path, driver="COG", COMPRESS="LZW", BLOCKSIZE=block_size,
+                             OVERVIEW_RESAMPLING="AVERAGE", BIGTIFF="IF_SAFER")
+    finally:
+        close()
+        if cog and os.path.exists(tiled_path):
+            os.remove(tiled_path)
 
     print(f"Conversion réussie : {tif_path}")
 
-# Exemple d'utilisation
-webp_file = "pef_1880_map.webp"
-tif_file = "pef_1880_map.tif"
 
-# Tes bounds : (left, bottom, right, top)
-bounds = (34.120542941238725 + 0.008,
-            31.10529446421723 - 0.0058,
-            35.7498100593699 + 0.008,
-            33.46703792406347 + 0.003) # lon_min, lat_min, lon_max, lat_max
+if __name__ == "__main__":
+    from sys import argv
+
+    # Exemple d'utilisation
+    webp_file = argv[1] if len(argv) > 1 else "pef_1880_map.webp"
+    tif_file = argv[2] if len(argv) > 2 else "pef_1880_map.tif"
 
-# webp_to_geotiff(webp_file, tif_file, bou
-webp_to_geotiff(webp_file, tif_file, bounds=bounds)
+    # Tes bounds : (left, bottom, right, top)
+    bounds = (34.120542941238725 + 0.008,
+                31.10529446421723 - 0.0058,
+                35.7498100593699 + 0.008,
+                33.46703792406347 + 0.003) # lon_min, lat_min, lon_max, lat_max
 
+    webp_to_geotiff(webp_file, tif_file, bounds=bounds)
@@ -1,12 +1,24 @@
 #!/bin/python3
 from sys import argv
 import csv
+import hashlib
 import json
+from geojson_writer import GeoJsonWriter
+from publish import GEOJSON_DIR, output_path, pop_output_dir
+from spatial_index import GridIndex, parse_coordinate
 
-if len(argv) != 2:
+pretty = "--pretty" in argv
+args = [arg for arg in argv[1:] if arg != "--pretty"]
+output_dir = pop_output_dir(args, GEOJSON_DIR)  # -o DOSSIER, public/ par défaut
+if not 1 <= len(args) <= 3:
     exit(84)
 
-file_name = argv[1]
+file_name = args[0]
+events_file = args[1] if len(args) > 1 else None  # merged.json : événements géocodés
+RADIUS_KM = float(args[2]) if len(args) > 2 else 10.0
+if not RADIUS_KM > 0:  # aussi la taille des cases de l'index
+    exit(84)
+MAX_RELATED = 20
 
 dicos = {
     "Gomorrhe ?": {"links_more": [{"name": "Vidéo", "url": 'https://www.youtube.com/watch?v=YpdYveOi28A'}, {"url": 'https://edifiant.fr/sodome-et-gomorrhe/'}]},
@@ -14,13 +26,42 @@ dicos = {
 }
 
 
-def csv_to_geoJson(file_name):
-    features = []
+def event_id(event: dict) -> str:
+    # dérivé du contenu : la position dans merged.json change à chaque fusion.
+    # Titre, date et lieu ne suffisent pas (des apparitions distinctes les
+    # partagent) : visionnaires et coordonnées les départagent ; seuls les
+    # doublons exacts ont le même id.
+    fields = ("title", "date", "place", "visionaries", "latitude", "longitude")
+    key = json.dumps([event.get(field) for field in fields], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def load_events(events_file, radius_km):
+    index = GridIndex(cell_km=radius_km)
+    with open(events_file, mode='r', encoding='utf-8') as file:
+        events = json.load(file)
+    for event in events:
+        lat = parse_coordinate(event.get("latitude"))
+        lng = parse_coordinate(event.get("longitude"))
+        if lat is None or lng is None:
+            continue
+        index.add(lat, lng, {
+            "id": event_id(event),
+            "title": event.get("title") or event.get("place"),
+            "date": event.get("date"),
+        })
+    return index
+
+
+def related_events(index, lat, lng):
+    if index is None:
+        return []
+    return [{**event, "distance_km": round(d, 2)} for d, event in index.within(lat, lng, RADIUS_KM, MAX_RELATED)]
+
+
+def csv_to_geoJson(file_name, index=None):
     with open(file_name, mode='r', encoding='utf-8') as file:
-        size = len(list(csv.DictReader(file)))
-        file.seek(0, 0)
-        reader = csv.DictReader(file)
-        for i, row in enumerate(reader):
+        for row in csv.DictReader(file):
 
             if not (row["lat"] and row["long"]):
                 continue
@@ -52,7 +93,7 @@ def csv_to_geoJson(file_name):
                 },
                 "properties": {
                     "fr": fr_name,
-                    "related_event": [],
+                    "related_event": related_events(index, float(row["lat"]), float(row["long"])),
                     "img": img,
                     "description": description,
                     "links_more": links_more,
@@ -62,15 +103,14 @@ def csv_to_geoJson(file_name):
                     "testament": "NT",
                 }
             }
-            features.append(feature)
-    return {
-        "type": "FeatureCollection",
-        "features": features
-    }
-geojson_data = csv_to_geoJson(file_name)
-output_file = file_name.split('.')[0] + ".geojson"
-
-with open(output_file, mode='w', encoding='utf-8') as geojson_file:
-    json.dump(geojson_data, geojson_file, indent=4, ensure_ascii=False)
+            yield feature
+
+
+index = load_events(events_file, RADIUS_KM) if events_file else None
+output_file = output_path(file_name, ".geojson", output_dir)
+
+with GeoJsonWriter(output_file, pretty=pretty) as writer:
+    for feature in csv_to_geoJson(file_name, index):
+        writer.write(feature)
 
 print(f"Fichier GeoJSON généré : {output_file}")
@@ -0,0 +1,178 @@
+#!/bin/python3
+import json
+import math
+import os
+import shutil
+import struct
+
+from publish import PUBLIC_DIR
+
+EXTENT = 4096
+BUFFER = 64          # marge en unités de tuile : une icône près du bord apparaît des deux côtés
+MIN_ZOOM = 0
+MAX_ZOOM = 14
+OUTPUT_DIR = os.path.join(PUBLIC_DIR, "tiles_vector")
+
+
+# --- encodage protobuf minimal de la spec Mapbox Vector Tile 2.1 (points uniquement) ---
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _field(number: int, data: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def _packed(number: int, values: list) -> bytes:
+    return _field(number, b"".join(_varint(v) for v in values))
+
+
+def _value(value) -> bytes:
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        return _uint_field(5, value) if value >= 0 else _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack("<d", value)
+    return _field(1, str(value).encode("utf-8"))
+
+
+def tile_property(value):
+    """MVT n'accepte que des scalaires : listes et objets sont gardés en JSON texte, None est omis."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_layer(name: str, features: list) -> bytes:
+    """features : (id, properties, [(x, y), ...]) en coordonnées de tuile."""
+    keys, values = {}, {}
+    body = bytearray()
+    for fid, properties, points in features:
+        tags = []
+        for key, value in properties.items():
+            value = tile_property(value)
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        geometry = [(1 & 0x7) | (len(points) << 3)]  # MoveTo x n
+        cx = cy = 0
+        for x, y in points:
+            geometry += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+        feature = _uint_field(1, fid) + _packed(2, tags) + _uint_field(3, 1) + _packed(4, geometry)
+        body += _field(2, feature)
+    layer = _uint_field(15, 2) + _field(1, name.encode("utf-8")) + bytes(body)
+    layer += b"".join(_field(3, key.encode("utf-8")) for key in keys)
+    layer += b"".join(_field(4, _value(value)) for _, value in values)
+    layer += _uint_field(5, EXTENT)
+    return _field(3, layer)
+
+
+# --- découpage ---
+
+def world_xy(lon: float, lat: float) -> tuple:
+    """Position Web Mercator dans [0, 1]²."""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = (lon + 180) / 360
+    sin = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return x, y
+
+
+def feature_min_zoom(feature: dict) -> float:
+    value = feature.get("properties", {}).get("min_zoom")
+    return float(value) if value is not None else MIN_ZOOM
+
+
+def cut_tiles(features: list, zoom: int, keep: list | None = None) -> dict:
+    """
+    {(x, y): [(id, properties, [(px, py)])]} pour les points visibles à ce zoom.
+    keep : propriétés gardées dans les tuiles (toutes par défaut) ; l'id est
+    l'indice de la feature dans le fichier, pour retrouver le reste côté client.
+    """
+    tiles = {}
+    scale = 1 << zoom
+    margin = BUFFER / EXTENT
+    for fid, feature in enumerate(features):
+        if feature.get("geometry", {}).get("type") != "Point" or feature_min_zoom(feature) > zoom:
+            continue
+        properties = feature.get("properties", {})
+        if keep is not None:
+            properties = {key: properties[key] for key in keep if key in properties}
+        wx, wy = world_xy(*feature["geometry"]["coordinates"][:2])
+        fx, fy = wx * scale, wy * scale
+        # la tuile du point, plus les voisines dont la marge le contient
+        for tx in {int(fx), int(fx - margin), int(fx + margin)}:
+            for ty in {int(fy), int(fy - margin), int(fy + margin)}:
+                if 0 <= tx < scale and 0 <= ty < scale:
+                    px = round((fx - tx) * EXTENT)
+                    py = round((fy - ty) * EXTENT)
+                    tiles.setdefault((tx, ty), []).append((fid, properties, [(px, py)]))
+    return tiles
+
+
+def write_tiles(features: list, layer: str, output_dir: str, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                keep: list | None = None) -> dict:
+    # les tuiles d'une génération précédente qui n'existent plus seraient servies périmées
+    shutil.rmtree(output_dir, ignore_errors=True)
+    counts = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        tiles = cut_tiles(features, zoom, keep)
+        for (x, y), tile_features in tiles.items():
+            path = os.path.join(output_dir, str(zoom), str(x))
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, f"{y}.pbf"), mode="wb") as fd:
+                fd.write(encode_layer(layer, tile_features))
+        counts[zoom] = (len(tiles), max((len(f) for f in tiles.values()), default=0))
+    with open(os.path.join(output_dir, "tiles.json"), mode="w", encoding="utf-8") as fd:
+        json.dump({
+            "tilejson": "3.0.0",
+            "tiles": ["/" + os.path.relpath(output_dir, PUBLIC_DIR).replace(os.sep, "/") + "/{z}/{x}/{y}.pbf"],
+            "minzoom": min_zoom,
+            "maxzoom": max_zoom,
+            "vector_layers": [{"id": layer, "fields": {}}],
+        }, fd, indent=4)
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Découpe une couche GeoJSON de points en tuiles vectorielles MVT")
+    parser.add_argument("file", help="sortie de conv_data_to_geojson.py ou csv_to_geoJson.py")
+    parser.add_argument("-l", "--layer", help="nom de la couche (nom du fichier par défaut)")
+    parser.add_argument("-z", "--zooms", default=f"{MIN_ZOOM}-{MAX_ZOOM}", help="plage de zooms, ex. 0-14")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR)
+    parser.add_argument("-p", "--properties", help="propriétés gardées, séparées par des virgules (ex. fr,icon,min_zoom)")
+    args = parser.parse_args()
+
+    layer = args.layer or os.path.splitext(os.path.basename(args.file))[0]
+    min_zoom, max_zoom = map(int, args.zooms.split("-"))
+    with open(args.file, mode="r", encoding="utf-8") as fd:
+        features = json.load(fd)["features"]
+
+    output_dir = os.path.join(args.output, layer)
+    keep = args.properties.split(",") if args.properties else None
+    counts = write_tiles(features, layer, output_dir, min_zoom, max_zoom, keep)
+    for zoom, (tiles, densest) in counts.items():
+        print(f"z{zoom:<2} : {tiles:6} tuiles, {densest:5} points max par tuile")
+    print(f"Tuiles écrites dans {output_dir}")
@@ -0,0 +1,75 @@
+import json
+import os
+from publish import PRECISION, quantize, report, publish as publish_file
+
+FEATURE_COLLECTION = {"type": "FeatureCollection"}
+
+
+def _indent(text: str, width: int) -> str:
+    return text.replace("\n", "\n" + " " * width)
+
+
+class GeoJsonWriter:
+    """
+    Écrit une collection élément par élément : seul l'élément en cours est en
+    mémoire. Compact par défaut ; pretty=True donne exactement la sortie de
+    json.dump(..., indent=4). Pour un autre document que {"type":
+    "FeatureCollection", "features": [...]}, passer key et header.
+    Les coordonnées sont arrondies à precision décimales. Tout est écrit dans
+    un fichier temporaire qui ne remplace path qu'à la fermeture sans erreur ;
+    le fichier passe alors par publish() (.gz, .br et manifest.json) s'il est
+    sous public/. Une exception dans le bloc with laisse l'ancien fichier.
+    """
+    def __init__(self, path: str, pretty: bool = False, key: str = "features", header: dict = FEATURE_COLLECTION,
+                 precision: int | None = PRECISION, publish: bool = True):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.fd = open(self.tmp_path, mode="w", encoding="utf-8")
+        self.pretty = pretty
+        self.precision = precision
+        self.publish = publish
+        self.count = 0
+        if pretty:
+            self.fd.write("{\n")
+            for name, value in header.items():
+                text = json.dumps(value, ensure_ascii=False, indent=4)
+                self.fd.write(f"    {json.dumps(name, ensure_ascii=False)}: {_indent(text, 4)},\n")
+            self.fd.write(f"    {json.dumps(key, ensure_ascii=False)}: [")
+        else:
+            head = json.dumps(header, ensure_ascii=False, separators=(",", ":"))[:-1]
+            self.fd.write(head + ("," if header else "") + json.dumps(key, ensure_ascii=False) + ":[")
+
+    def write(self, item):
+        item = quantize(item, self.precision)
+        if self.pretty:
+            text = json.dumps(item, ensure_ascii=False, indent=4)
+            self.fd.write(("\n" if self.count == 0 else ",\n") + " " * 8 + _indent(text, 8))
+        else:
+            text = json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+            self.fd.write(text if self.count == 0 else "," + text)
+        self.count += 1
+
+    def close(self):
+        if self.pretty:
+            self.fd.write("\n    ]\n}" if self.count else "]\n}")
+        else:
+            self.fd.write("]}")
+        self.fd.close()
+        os.replace(self.tmp_path, self.path)
+        if self.publish:
+            report(self.path, publish_file(self.path))
+
+    def abort(self):
+        """Abandonne l'écriture : le fichier de sortie précédent est conservé."""
+        self.fd.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,160 @@
+#!/bin/python3
+import hashlib
+import json
+import os
+import re
+from html.parser import HTMLParser
+
+CACHE_DIR = ".json5_cache"
+
+# sous-ensemble JSON5 des exports du site : clés sans guillemets, chaînes entre
+# apostrophes, virgules finales et commentaires. Le reste passe tel quel.
+TOKEN_RE = re.compile(r"""
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<key>[A-Za-z_$][\w$]*)(?=\s*:)
+  | (?P<comma>,(?=(?:\s|//[^\n]*|/\*.*?\*/)*[\]}]))
+""", re.S | re.X)
+ESCAPE_RE = re.compile(r'\\(x[0-9A-Fa-f]{2}|\r\n|.)|"', re.S)
+JSON_ESCAPES = set('"\\/bfnrtu')
+
+
+def _string(body: str) -> str:
+    def escape(match):
+        char = match.group(1)
+        if char is None:
+            return '\\"'
+        if char in JSON_ESCAPES:
+            return "\\" + char
+        if char[0] == "x":
+            return "\\u00" + char[1:]
+        if char in ("\n", "\r", "\r\n", "\u2028", "\u2029"):  # continuation de ligne
+            return ""
+        # \0, \v et les échappements d'un caractère quelconque (\' par exemple)
+        return {"0": "\\u0000", "v": "\\u000b"}.get(char, char)
+    return '"' + ESCAPE_RE.sub(escape, body) + '"'
+
+
+def _token(match) -> str:
+    kind = match.lastgroup
+    text = match.group(kind)
+    if kind == "string":
+        return _string(text[1:-1])
+    if kind == "key":
+        return f'"{text}"'
+    return ""
+
+
+def json5_to_json(text: str) -> str:
+    return TOKEN_RE.sub(_token, text)
+
+
+def loads_json5(text: str):
+    try:
+        return json.loads(json5_to_json(text), strict=False)
+    except json.JSONDecodeError:
+        # syntaxe JSON5 hors du sous-ensemble géré : parseur complet, lent
+        import json5
+        return json5.loads(text)
+
+
+def _cache_path(file_name: str) -> str:
+    key = hashlib.sha1(os.path.abspath(file_name).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR, f"{key}.json")
+
+
+def load_json5(file_name: str, use_cache: bool = True):
+    """
+    Charge un fichier JSON5. La conversion en JSON strict est faite une seule
+    fois puis mise en cache : le cache est valide si mtime et taille n'ont pas
+    changé, ou à défaut si le sha256 du contenu est le même.
+    """
+    stat = os.stat(file_name)
+    cache_file = _cache_path(file_name)
+    meta = None
+    if use_cache and os.path.isfile(cache_file):
+        with open(cache_file, mode="r", encoding="utf-8") as fd:
+            meta = json.loads(fd.readline())
+            if meta["mtime"] == stat.st_mtime and meta["size"] == stat.st_size:
+                return json.load(fd)
+
+    with open(file_name, mode="rb") as fd:
+        raw = fd.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if meta is not None and meta["sha256"] == digest:
+        # fichier touché mais identique : on relit le cache et on met à jour son mtime
+        with open(cache_file, mode="r", encoding="utf-8") as fd:
+            fd.readline()
+            data = json.load(fd)
+    else:
+        data = loads_json5(raw.decode("utf-8"))
+    if use_cache:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, mode="w", encoding="utf-8") as fd:
+            fd.write(json.dumps({"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest}) + "\n")
+            json.dump(data, fd, ensure_ascii=False, separators=(",", ":"))
+    return data
+
+
+class TextExtractor(HTMLParser):
+    """Garde le texte et décode les entités, sans construire d'arbre."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def text(self, html: str) -> str:
+        self.reset()
+        self.parts = []
+        self.feed(html)
+        self.close()
+        return "".join(self.parts)
+
+
+_extractor = TextExtractor()
+
+
+def strip_html(html: str) -> str:
+    return _extractor.text(html)
+
+
+if __name__ == "__main__":
+    from sys import argv
+    from time import perf_counter
+
+    file_name = argv[1] if len(argv) > 1 else "../src_files/data.json"
+
+    def bench(name, func, repeat=3):
+        start = perf_counter()
+        for _ in range(repeat):
+            result = func()
+        print(f"{name:>32} : {(perf_counter() - start) / repeat * 1000:8.1f} ms")
+        return result
+
+    with open(file_name, mode="r", encoding="utf-8") as fd:
+        content = fd.read()
+    print(f"{file_name} : {len(content) / 1e6:.2f} Mo")
+
+    strict = bench("JSON5 -> JSON (regex)", lambda: json5_to_json(content))
+    data = bench("json.loads", lambda: json.loads(strict, strict=False))
+    if os.path.isfile(_cache_path(file_name)):
+        os.remove(_cache_path(file_name))
+    bench("load_json5 (cache vide)", lambda: load_json5(file_name), repeat=1)
+    cached = bench("load_json5 (cache valide)", lambda: load_json5(file_name))
+    try:
+        import json5
+        reference = bench("json5.loads", lambda: json5.loads(content), repeat=1)
+        print(f"{'':>32}   résultats identiques : {reference == data == cached}")
+    except ImportError:
+        print(f"{'json5.loads':>32} : module json5 absent")
+
+    texts = [d["Texte"] for d in data if d["Texte"]]
+    stripped = bench("strip_html (HTMLParser)", lambda: [strip_html(t) for t in texts])
+    try:
+        from bs4 import BeautifulSoup
+        soup = bench("BeautifulSoup().get_text()", lambda: [BeautifulSoup(t, "html.parser").get_text() for t in texts])
+        print(f"{'':>32}   résultats identiques : {soup == stripped}")
+    except ImportError:
+        print(f"{'BeautifulSoup':>32} : module bs4 absent")
@@ -0,0 +1,163 @@
+#!/bin/python3
+import gzip
+import hashlib
+import json
+import os
+
+PRECISION = 6  # ~10 cm, largement assez pour la carte
+MANIFEST = "manifest.json"
+COORD_KEYS = {"coordinates", "latlong", "latitude", "longitude"}
+CHUNK_SIZE = 1 << 16
+# seuls les fichiers servis par le site sont compressés et inscrits au manifest
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "public")
+GEOJSON_DIR = os.path.join(PUBLIC_DIR, "geoJson_files")
+JSON_DIR = os.path.join(PUBLIC_DIR, "json_files")
+
+
+def _round(value, precision: int):
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, list):
+        return [_round(v, precision) for v in value]
+    return value
+
+
+def quantize(obj, precision: int | None = PRECISION):
+    """Arrondit les coordonnées (coordinates, latlong, latitude, longitude) d'un objet JSON, en place."""
+    if precision is None:
+        return obj
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in COORD_KEYS:
+                obj[key] = _round(value, precision)
+            else:
+                quantize(value, precision)
+    elif isinstance(obj, list):
+        for value in obj:
+            quantize(value, precision)
+    return obj
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def compress(path: str) -> dict:
+    """Écrit path.gz et path.br (si brotli est installé) par blocs ; retourne tailles et hash."""
+    sha = hashlib.sha256()
+    brotli = _brotli()
+    br_file = None
+    with open(path, mode="rb") as src, gzip.GzipFile(path + ".gz", mode="wb", compresslevel=9, mtime=0) as gz:
+        if brotli is not None:
+            br_file = open(path + ".br", mode="wb")
+            compressor = brotli.Compressor(quality=11)
+        while chunk := src.read(CHUNK_SIZE):
+            sha.update(chunk)
+            gz.write(chunk)
+            if br_file is not None:
+                br_file.write(compressor.process(chunk))
+        if br_file is not None:
+            br_file.write(compressor.finish())
+            br_file.close()
+    if brotli is None and os.path.isfile(path + ".br"):
+        os.remove(path + ".br")  # ancienne version, qui ne correspond plus
+    digest = sha.hexdigest()
+    return {
+        "bytes": os.path.getsize(path),
+        "gzip": os.path.getsize(path + ".gz"),
+        "br": os.path.getsize(path + ".br") if brotli is not None else None,
+        "sha256": digest,
+        "url": f"{os.path.basename(path)}?v={digest[:10]}",
+    }
+
+
+def update_manifest(path: str, entry: dict):
+    manifest_file = os.path.join(os.path.dirname(os.path.abspath(path)), MANIFEST)
+    manifest = {}
+    if os.path.isfile(manifest_file):
+        with open(manifest_file, mode="r", encoding="utf-8") as fd:
+            manifest = json.load(fd)
+    manifest[os.path.basename(path)] = entry
+    with open(manifest_file, mode="w", encoding="utf-8") as fd:
+        json.dump(dict(sorted(manifest.items())), fd, indent=4)
+
+
+def output_path(file_name: str, extension: str, output_dir: str = GEOJSON_DIR) -> str:
+    """Sortie d'un convertisseur : nom du fichier d'entrée, dans output_dir (public/ par défaut, donc publiée)."""
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(file_name))[0] + extension)
+
+
+def pop_output_dir(args: list, default: str) -> str:
+    """Retire "-o DOSSIER" de args et retourne le dossier (default sinon)."""
+    if "-o" not in args:
+        return default
+    i = args.index("-o")
+    if i + 1 >= len(args):
+        exit(84)
+    output_dir = args[i + 1]
+    del args[i:i + 2]
+    return output_dir
+
+
+def is_public(path: str) -> bool:
+    public = os.path.realpath(PUBLIC_DIR)
+    return os.path.commonpath([public, os.path.realpath(path)]) == public
+
+
+def publish(path: str) -> dict | None:
+    """
+    Compresse un fichier déjà écrit (minifié) et l'inscrit dans le manifest
+    de son dossier. Un fichier hors de public/ n'est pas publié : None.
+    """
+    if not is_public(path):
+        return None
+    entry = compress(path)
+    update_manifest(path, entry)
+    return entry
+
+
+def write_json(path: str, data, precision: int | None = PRECISION) -> dict | None:
+    """
+    Écrit data minifié avec des coordonnées arrondies, puis publie le fichier.
+    L'écriture passe par un fichier temporaire : en cas d'erreur, l'ancienne
+    version reste en place.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode="w", encoding="utf-8") as fd:
+            json.dump(quantize(data, precision), fd, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return publish(path)
+
+
+def report(path: str, entry: dict | None):
+    if entry is None:
+        print(f"{path} : {os.path.getsize(path) / 1e3:.1f} ko, non publié (hors de public/)")
+        return
+    br = f", br {entry['br'] / 1e3:.1f} ko" if entry["br"] is not None else ", br indisponible (module brotli absent)"
+    print(f"{path} : {entry['bytes'] / 1e3:.1f} ko, gzip {entry['gzip'] / 1e3:.1f} ko{br}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Minifie, arrondit et précompresse des fichiers GeoJSON/JSON existants")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("-p", "--precision", type=int, default=PRECISION, help="décimales gardées sur les coordonnées")
+    args = parser.parse_args()
+
+    for path in args.files:
+        with open(path, mode="r", encoding="utf-8") as fd:
+            data = json.load(fd)
+        before = os.path.getsize(path)
+        entry = write_json(path, data, args.precision)
+        print(f"{before / 1e3:.1f} ko ->", end=" ")
+        report(path, entry)
@@ -0,0 +1,130 @@
+#!/bin/python3
+import numpy as np
+
+from geojson_writer import GeoJsonWriter
+
+PIXELS = 0.5         # écart toléré, en pixels écran, entre la ligne simplifiée et l'originale
+TILE_SIZE = 512
+MIN_ZOOM = 6
+MAX_ZOOM = 12        # au-delà, la couche d'origine est utilisée
+
+
+def project(coords: np.ndarray) -> np.ndarray:
+    """lon/lat -> Web Mercator dans [0, 1]², sur tout le tableau."""
+    lat = np.radians(np.clip(coords[:, 1], -85.05112878, 85.05112878))
+    x = (coords[:, 0] + 180) / 360
+    y = 0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)
+    return np.column_stack((x, y))
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float, keep: np.ndarray | None = None) -> np.ndarray:
+    """
+    Masque des sommets gardés. Les distances d'un segment à tous ses sommets
+    intermédiaires sont calculées d'un coup ; seule la pile des segments est
+    en Python. Les sommets de keep (extrémités partagées) sont toujours gardés.
+    """
+    mask = np.zeros(len(points), dtype=bool)
+    anchors = np.flatnonzero(keep) if keep is not None else np.empty(0, dtype=int)
+    anchors = np.unique(np.concatenate(([0, len(points) - 1], anchors)))
+    mask[anchors] = True
+    stack = list(zip(anchors[:-1], anchors[1:]))
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = points[first], points[last]
+        inner = points[first + 1:last]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            distances = np.hypot(*(inner - a).T)
+        else:
+            distances = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            mask[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return mask
+
+
+def iter_lines(geometry: dict | None):
+    # "geometry": null est du GeoJSON valide : aucune ligne
+    if not geometry:
+        return
+    if geometry["type"] == "LineString":
+        yield geometry["coordinates"]
+    elif geometry["type"] == "MultiLineString":
+        yield from geometry["coordinates"]
+
+
+def shared_vertices(features: list) -> set:
+    """Sommets présents dans plusieurs lignes ou extrémités : les jonctions du réseau à ne pas déplacer."""
+    seen, shared = set(), set()
+    for feature in features:
+        for line in iter_lines(feature.get("geometry")):
+            keys = {tuple(point[:2]) for point in line}
+            shared |= seen & keys
+            seen |= keys
+            shared.add(tuple(line[0][:2]))
+            shared.add(tuple(line[-1][:2]))
+    return shared
+
+
+def simplify_line(line: list, tolerance: float, shared: set) -> list:
+    coords = np.asarray(line, dtype=float)
+    if len(coords) <= 2:
+        return line
+    keep = np.fromiter((tuple(point[:2]) in shared for point in line), dtype=bool, count=len(line))
+    mask = douglas_peucker(project(coords[:, :2]), tolerance, keep)
+    return [line[i] for i in np.flatnonzero(mask)]
+
+
+def simplify_features(features: list, zoom: int, shared: set, pixels: float = PIXELS) -> tuple:
+    """
+    Retourne les features simplifiées pour ce zoom et le nombre de sommets
+    gardés. Les géométries autres que des lignes (ou absentes) sont recopiées telles quelles.
+    """
+    tolerance = pixels / (TILE_SIZE * (1 << zoom))
+    result, kept = [], 0
+    for feature in features:
+        geometry = feature.get("geometry")
+        if not geometry or geometry["type"] not in ("LineString", "MultiLineString"):
+            result.append(feature)
+            continue
+        lines = [simplify_line(line, tolerance, shared) for line in iter_lines(geometry)]
+        kept += sum(len(line) for line in lines)
+        coordinates = lines[0] if geometry["type"] == "LineString" else lines
+        result.append({**feature, "geometry": {**geometry, "coordinates": coordinates}})
+    return result, kept
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description="Variantes simplifiées par zoom des couches de routes")
+    parser.add_argument("files", nargs="+", help="GeoJSON de lignes (route_*_merged.geojson)")
+    parser.add_argument("-p", "--pixels", type=float, default=PIXELS, help="tolérance en pixels écran")
+    parser.add_argument("-z", "--zooms", default=f"{MIN_ZOOM}-{MAX_ZOOM}", help="plage de zooms, ex. 6-12")
+    args = parser.parse_args()
+    min_zoom, max_zoom = map(int, args.zooms.split("-"))
+
+    for file_name in args.files:
+        with open(file_name, mode="r", encoding="utf-8") as fd:
+            data = json.load(fd)
+        features = data["features"]
+        header = {key: value for key, value in data.items() if key != "features"}
+        shared = shared_vertices(features)
+        total = sum(len(line) for f in features for line in iter_lines(f.get("geometry")))
+        base = os.path.splitext(file_name)[0]
+        print(f"{file_name} : {total} sommets, {len(shared)} jonctions gardées")
+        for zoom in range(min_zoom, max_zoom + 1):
+            simplified, kept = simplify_features(features, zoom, shared, args.pixels)
+            with GeoJsonWriter(f"{base}_z{zoom}.geojson", header=header) as writer:
+                for feature in simplified:
+                    writer.write(feature)
+            saved = 1 - kept / total if total else 0.0
+            print(f"  z{zoom:<2} : {kept} sommets ({saved:.1%} de moins)")
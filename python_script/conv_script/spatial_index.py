@@ -0,0 +1,70 @@
+import math
+import re
+
+EARTH_KM = 6371.0
+KM_PER_DEG = 111.195
+
+
+def parse_coordinate(value) -> float | None:
+    """Décimal (41.65, "41.65") ou DMS ("N 41°39′21''") ; None si absent ou illisible."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    match = re.match(r"([NSEW])\s*(\d+)°\s*(\d+)′\s*(\d+)''", str(value))
+    if not match:
+        return None
+    direction, deg, minutes, seconds = match.groups()
+    decimal = int(deg) + int(minutes) / 60 + int(seconds) / 3600
+    return -decimal if direction in "SW" else decimal
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * math.asin(math.sqrt(h))
+
+
+class GridIndex:
+    """
+    Grille uniforme en degrés : chaque point est rangé dans sa case, une
+    requête par rayon ne regarde que les cases qui recouvrent le cercle.
+    """
+    def __init__(self, cell_km: float = 10.0):
+        if not cell_km > 0:
+            raise ValueError(f"taille de case invalide : {cell_km} km (doit être > 0)")
+        self.cell = cell_km / KM_PER_DEG
+        self.cells = {}
+        self.points = []
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+
+    def add(self, lat: float, lon: float, item):
+        self.cells.setdefault(self._cell(lat, lon), []).append(len(self.points))
+        self.points.append((lat, lon, item))
+
+    def within(self, lat: float, lon: float, radius_km: float, limit: int | None = None) -> list:
+        """(distance, item) à moins de radius_km, du plus proche au plus lointain."""
+        if radius_km < 0:
+            raise ValueError(f"rayon invalide : {radius_km} km")
+        row, col = self._cell(lat, lon)
+        rows = math.ceil(radius_km / KM_PER_DEG / self.cell)
+        # les méridiens se resserrent avec la latitude : plus de colonnes à couvrir
+        shrink = max(math.cos(math.radians(min(abs(lat) + rows * self.cell, 89.9))), 1e-6)
+        cols = min(math.ceil(rows / shrink), math.ceil(180 / self.cell))
+        found = []
+        for r in range(row - rows, row + rows + 1):
+            for c in range(col - cols, col + cols + 1):
+                for i in self.cells.get((r, c), ()):
+                    plat, plon, item = self.points[i]
+                    d = distance_km(lat, lon, plat, plon)
+                    if d <= radius_km:
+                        found.append((d, i))
+        found.sort()
+        return [(d, self.points[i][2]) for d, i in found[:limit]]
+
+    def __len__(self):
+        return len(self.points)
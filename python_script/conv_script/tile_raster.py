@@ -0,0 +1,131 @@
+#!/bin/python3
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.enums import ColorInterp, Resampling
+from rasterio.transform import from_bounds
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import transform_bounds
+
+TILE_SIZE = 256
+QUALITY = 65
+MIN_ZOOM = 6
+MAX_ZOOM = 13
+OUTPUT_DIR = "../../public/tiles_pef_1880_map"
+ORIGIN = 20037508.342789244  # demi-circonférence Web Mercator, en mètres
+
+_source = None
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple:
+    """Emprise EPSG:3857 (left, bottom, right, top) d'une tuile XYZ."""
+    size = 2 * ORIGIN / (1 << z)
+    left = -ORIGIN + x * size
+    top = ORIGIN - y * size
+    return left, top - size, left + size, top
+
+
+def tile_range(bounds: tuple, z: int) -> tuple:
+    """Tuiles XYZ (x_min, y_min, x_max, y_max) couvrant une emprise lon/lat."""
+    def xy(lon, lat):
+        lat = max(min(lat, 85.05112878), -85.05112878)
+        n = 1 << z
+        x = (lon + 180) / 360 * n
+        y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+        return min(int(x), n - 1), min(int(y), n - 1)
+    left, bottom, right, top = bounds
+    x0, y0 = xy(left, top)
+    x1, y1 = xy(right, bottom)
+    return x0, y0, x1, y1
+
+
+def _open_source(path: str):
+    # un seul ouverture du GeoTIFF par processus, réutilisée pour toutes ses tuiles
+    global _source
+    _source = rasterio.open(path)
+
+
+def _alpha_band(src) -> int | None:
+    if ColorInterp.alpha in src.colorinterp:
+        return src.colorinterp.index(ColorInterp.alpha)
+    # conv_img_to_tif.py écrit le RGBA du WebP sans marquer la 4e bande comme alpha
+    if src.count == 4:
+        return 3
+    return None
+
+
+def render_tile(args) -> int:
+    """Lit la fenêtre de la tuile, reprojetée, et l'écrit en WebP. Retourne la taille écrite (0 si vide)."""
+    z, x, y, output_dir, quality, resampling = args
+    src = _source
+    alpha_index = _alpha_band(src)
+    with WarpedVRT(src, crs="EPSG:3857", transform=from_bounds(*tile_bounds(z, x, y), TILE_SIZE, TILE_SIZE),
+                   width=TILE_SIZE, height=TILE_SIZE, resampling=Resampling[resampling],
+                   add_alpha=alpha_index is None) as vrt:
+        data = vrt.read()
+    # sans canal alpha dans la source, WarpedVRT en ajoute un en dernier (zones hors carte)
+    alpha = data[-1 if alpha_index is None else alpha_index]
+    if not alpha.any():
+        return 0  # tuile entièrement transparente : rien à encoder
+    colors = np.delete(data, len(data) - 1 if alpha_index is None else alpha_index, axis=0)
+    bands = colors[:3] if len(colors) >= 3 else np.repeat(colors[:1], 3, axis=0)
+    if alpha.min() == 255:
+        image = Image.fromarray(np.ascontiguousarray(np.moveaxis(bands, 0, -1)).astype(np.uint8), "RGB")
+    else:
+        rgba = np.concatenate((bands, alpha[np.newaxis]), axis=0)
+        image = Image.fromarray(np.ascontiguousarray(np.moveaxis(rgba, 0, -1)).astype(np.uint8), "RGBA")
+    path = os.path.join(output_dir, str(z), str(x))
+    os.makedirs(path, exist_ok=True)
+    file_name = os.path.join(path, f"{y}.webp")
+    image.save(file_name, "WEBP", quality=quality, method=4)
+    return os.path.getsize(file_name)
+
+
+def tile_raster(tif_path: str, output_dir: str = OUTPUT_DIR, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                quality: int = QUALITY, workers: int | None = None, resampling: str = "average") -> dict:
+    """
+    Génère l'arbre XYZ {z}/{x}/{y}.webp depuis un GeoTIFF (sortie de
+    conv_img_to_tif.py ou de gdalwarp). Chaque tuile est lue et encodée dans
+    un processus du pool ; les tuiles transparentes ne sont pas écrites.
+    """
+    with rasterio.open(tif_path) as src:
+        bounds = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+    jobs = []
+    for z in range(min_zoom, max_zoom + 1):
+        x0, y0, x1, y1 = tile_range(bounds, z)
+        jobs += [(z, x, y, output_dir, quality, resampling) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    stats = {z: [0, 0, 0] for z in range(min_zoom, max_zoom + 1)}  # tuiles vues, écrites, octets
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_source, initargs=(tif_path,)) as pool:
+        for job, size in zip(jobs, pool.map(render_tile, jobs, chunksize=16)):
+            stat = stats[job[0]]
+            stat[0] += 1
+            stat[1] += size > 0
+            stat[2] += size
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    from time import time
+
+    parser = argparse.ArgumentParser(description="Tuiles WebP XYZ en parallèle depuis un GeoTIFF")
+    parser.add_argument("tif", help="GeoTIFF géoréférencé (conv_img_to_tif.py, gdalwarp)")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR)
+    parser.add_argument("-z", "--zooms", default=f"{MIN_ZOOM}-{MAX_ZOOM}", help="plage de zooms, ex. 6-13")
+    parser.add_argument("-q", "--quality", type=int, default=QUALITY, help="qualité WebP")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processus (tous les coeurs par défaut)")
+    parser.add_argument("-r", "--resampling", default="average", help="rééchantillonnage rasterio (average, bilinear...)")
+    args = parser.parse_args()
+
+    min_zoom, max_zoom = map(int, args.zooms.split("-"))
+    start = time()
+    stats = tile_raster(args.tif, args.output, min_zoom, max_zoom, args.quality, args.workers, args.resampling)
+    for z, (seen, written, size) in stats.items():
+        print(f"z{z:<2} : {written:6}/{seen:<6} tuiles écrites, {size / 1e6:7.2f} Mo")
+    total = sum(s[1] for s in stats.values())
+    print(f"{total} tuiles en {time() - start:.1f}s dans {args.output}")
@@ -4,64 +4,151 @@ from os import getenv
 from groq import Groq
 from dotenv import load_dotenv
 import json
+import hashlib
+from itertools import islice
+from os.path import isfile
 from time import sleep
-
-if len(argv) < 2:
-    print("Usage: python correct_sentence.py <file>")
-    exit(1)
-
-filename = argv[1]
-load_dotenv()
+from llm_pool import LLMPool
+from llm_cache import LLMCache
+from json_stream import iter_json_array, iter_jsonl, JsonArrayWriter
 
 models = [
     "openai/gpt-oss-120b",
     "openai/gpt-oss-20b",
 ]
 
-def get_correct_sentence(text: str, client: Groq, index: int) -> str:
-    prompt = f"""Corrige l’orthographe du nom de lieu suivant uniquement s’il contient une faute.
+PLACE_PROMPT = """Corrige l’orthographe du nom de lieu suivant uniquement s’il contient une faute.
         Si aucune faute n’est trouvée, renvoie-le strictement identique.
         Ne renvoie rien d’autre que le nom du lieu corrigé (pas de markdown, pas d'explication).
 
         Lieu : "{text}"
     """
+
+def request_correction(text: str, client: Groq, index: int) -> str:
     completion = client.chat.completions.create(
         model=models[index % len(models)],
         messages=[
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": PLACE_PROMPT.format(text=text)}
         ],
         temperature=0.1
     )
     response = completion.choices[0].message.content.strip()
     return response
 
-client = Groq(api_key=getenv("AI_API_KEY"))
+def get_correct_sentence(text: str, client: Groq, index: int, cache: LLMCache | None = None) -> str:
+    if cache is None:
+        return request_correction(text, client, index)
+    return cache.cached_call(PLACE_PROMPT, ",".join(models), text,
+                             lambda: request_correction(text, client, index))
+
+def entry_id(entry: dict) -> str:
+    # identifiant stable dérivé du contenu : l'ordre du fichier d'entrée peut changer
+    text = json.dumps(entry, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def numbered(entries):
+    """
+    (id, entrée) : les doublons exacts reçoivent ":1", ":2"... après le hash,
+    selon leur rang parmi les entrées identiques, pour être tous gardés.
+    Mémoire en O(entrées distinctes), comme les ensembles d'ids du journal.
+    """
+    counts = {}
+    for entry in entries:
+        base = entry_id(entry)
+        n = counts.get(base, 0)
+        counts[base] = n + 1
+        yield (base if n == 0 else f"{base}:{n}"), entry
+
+def migrate_outputs(filename: str, journal: str):
+    """
+    Reprend dans le journal les fichiers corrected_/non_corrected_ d'une
+    version précédente. Une entrée corrigée n'a plus son "place" d'origine :
+    son id est retrouvé dans le fichier d'entrée par les autres champs. Si
+    aucune ou plusieurs entrées correspondent, elle n'est pas reprise et sera
+    simplement corrigée à nouveau.
+    """
+    originals = {}
+    if isfile("corrected_" + filename):
+        for record_id, entry in numbered(iter_json_array(filename)):
+            key = entry_id({k: v for k, v in entry.items() if k != "place"})
+            originals.setdefault(key, []).append(record_id)
+    with open(journal, "a", encoding="utf-8") as out:
+        for prefix, corrected in (("corrected_", True), ("non_corrected_", False)):
+            if not isfile(prefix + filename):
+                continue
+            for record_id, entry in numbered(iter_json_array(prefix + filename)):
+                if corrected:
+                    ids = originals.get(entry_id({k: v for k, v in entry.items() if k != "place"}), [])
+                    # plusieurs candidats : repris seulement s'ils sont des doublons exacts
+                    if not ids or len({i.split(":")[0] for i in ids}) != 1:
+                        continue
+                    record_id = ids.pop(0)
+                out.write(json.dumps({"id": record_id, "entry": entry, "corrected": corrected},
+                                     ensure_ascii=False) + "\n")
 
-with open("corrected_" + filename, "r", encoding="utf-8") as fd:
-    correct = json.load(fd)
-with open("non_corrected_" + filename, "r", encoding="utf-8") as fd:
-    non_correct = json.load(fd)
-i = 0
-while True:
-    try:
-        with open(filename, "r", encoding="utf-8") as fd:
-            data = json.load(fd)[i:]
-            for entry in data:
-                cor = get_correct_sentence(entry["place"], client, 0)
+def correct_file(filename: str, journal: str, client, cache: LLMCache, workers: int):
+    """
+    Traite les entrées pas encore journalisées, par vagues de `workers`.
+    Les entrées sont lues en flux ; seuls les ids déjà traités restent en
+    mémoire (O(entrées distinctes)).
+    """
+    done = {record["id"] for record in iter_jsonl(journal)} if isfile(journal) else set()
+    todo = ((record_id, entry) for record_id, entry in numbered(iter_json_array(filename))
+            if record_id not in done)
+    with open(journal, "a", encoding="utf-8") as out:
+        while True:
+            entries = list(islice(todo, workers))
+            if not entries:
+                break
+            cors = client.map(lambda item, n: get_correct_sentence(item[1]["place"], client, n, cache), entries)
+            for (record_id, entry), cor in zip(entries, cors):
                 if cor == entry["place"]:
-                    print(f"Non trouvé pour {entry["place"]}")
-                    non_correct.append(entry)
+                    print(f"Non trouvé pour {entry['place']}")
+                    record = {"id": record_id, "entry": entry, "corrected": False}
                 else:
-                    print(f"{entry["place"]} devient {cor}")
-                    correct.append({
-                        **entry,
-                        "place": cor,
-                    })
-                i += 1
-        break
-    except:
-        sleep(2)
-with open("corrected_" + filename, "w", encoding="utf-8") as fd:
-    json.dump(correct, fd, ensure_ascii=False, indent=4)
-with open("non_corrected_" + filename, "w", encoding="utf-8") as fd:
-    json.dump(non_correct, fd, ensure_ascii=False, indent=4)
+                    print(f"{entry['place']} devient {cor}")
+                    record = {"id": record_id, "entry": {**entry, "place": cor}, "corrected": True}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                done.add(record["id"])
+            out.flush()
+
+def compact(filename: str, journal: str):
+    """
+    Une seule passe sur le journal pour produire les fichiers finaux ; seul
+    l'ensemble des ids vus reste en mémoire (O(entrées distinctes)).
+    """
+    seen = set()
+    with JsonArrayWriter("corrected_" + filename) as correct, \
+         JsonArrayWriter("non_corrected_" + filename) as non_correct:
+        for record in iter_jsonl(journal):
+            if record["id"] in seen:
+                continue
+            seen.add(record["id"])
+            (correct if record["corrected"] else non_correct).write(record["entry"])
+    return correct.count, non_correct.count
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("Usage: python correct_sentence.py <file> [workers]")
+        exit(1)
+
+    filename = argv[1]
+    workers = int(argv[2]) if len(argv) > 2 else 4
+    journal = filename + ".journal.jsonl"
+    load_dotenv()
+    client = LLMPool(Groq(api_key=getenv("AI_API_KEY")), models, workers=workers)
+    cache = LLMCache()
+
+    if not isfile(journal):
+        migrate_outputs(filename, journal)
+    while True:
+        try:
+            correct_file(filename, journal, client, cache, workers)
+            break
+        except Exception as e:
+            print(f"Erreur : {e}, reprise dans 2s")
+            sleep(2)
+    corrected, non_corrected = compact(filename, journal)
+    print(f"{corrected} corrigés, {non_corrected} non corrigés")
+    cache.report()
+    cache.close()
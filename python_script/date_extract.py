@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+import re
+
+MONTHS_FR = [
+    "janvier", "février", "mars", "avril", "mai", "juin",
+    "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+    "janv", "févr", "avr", "juil", "sept", "oct", "nov", "déc"
+]
+MONTHS_EN = [
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec"
+]
+
+# compilés une seule fois pour tout le module
+MONTH_RE = re.compile(r'(?i)\b(?:' + '|'.join(MONTHS_FR) + r')\s+(\d{2,4})(?=[\s,])')
+EN_RE = re.compile(r'(?i)\ben\s+(\d{2,4})(?=[\s,])')
+COMMA_RE = re.compile(r'\b(\d{1,4})\s*,\s*(\d{1,4})\b')
+NUMBER_RE = re.compile(r'\b(\d{1,4})\b')
+# "July 11," : le jour du mois ne doit pas être pris pour une année
+DAY_RE = re.compile(r'(?i)\b(?:' + '|'.join(MONTHS_EN) + r')\.?\s+\d{1,2}(?:st|nd|rd|th)?\b,?')
+CENTURY_RE = re.compile(r'(?i)\b(\d{1,2})(?:st|nd|rd|th)\s*(?:century|cent\.|c\.)')
+YEAR_RE = re.compile(r'\b(\d{2,4})\b')
+# "1484 - 90" : fin de période abrégée
+ABBR_RANGE_RE = re.compile(r'\b(\d{1,2})(\d{2})\s*[-–]\s*(\d{2})\b(?!\s*,)')
+
+MIN_YEAR = 10
+MAX_YEAR = 2100
+
+
+def extract_year(html: str) -> int | None:
+    # 1️⃣ Priorité : mois + espace + nombre, 2️⃣ sinon : "en " + nombre
+    for pattern in (MONTH_RE, EN_RE):
+        for y in pattern.findall(html):
+            if MIN_YEAR <= int(y) <= MAX_YEAR:
+                return int(y)
+    return None
+
+
+def extract_year_after_comma(text: str) -> int | None:
+    # Priorité au second nombre de "nombre, nombre", sinon le premier nombre trouvé
+    match = COMMA_RE.search(text)
+    if match:
+        return int(match.group(2))
+    match = NUMBER_RE.search(text)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def _expand_range(match) -> str:
+    return f"{match.group(1)}{match.group(2)} - {match.group(1)}{match.group(3)}"
+
+
+def year_range(date: str) -> tuple:
+    """
+    (début, fin) d'une date miraclehunter : "July 11, 250", "708 or 717",
+    "1484 - 90", "5th century"... Les nombres à deux chiffres ne comptent comme
+    année que s'il n'y a aucune année à trois ou quatre chiffres.
+    """
+    cleaned = ABBR_RANGE_RE.sub(_expand_range, DAY_RE.sub(" ", date))
+    years = [int(y) for y in YEAR_RE.findall(cleaned) if MIN_YEAR <= int(y) <= MAX_YEAR]
+    if any(y >= 100 for y in years):
+        years = [y for y in years if y >= 100]
+    if years:
+        return min(years), max(years)
+    match = CENTURY_RE.search(cleaned)
+    if match:
+        century = int(match.group(1))
+        return (century - 1) * 100 + 1, century * 100
+    return None, None
+
+
+# --- versions vectorisées, sur des colonnes pandas entières ---
+
+def _first_in_range(series, pattern):
+    found = series.str.extractall(pattern)[0].astype(int)
+    found = found[(found >= MIN_YEAR) & (found <= MAX_YEAR)]
+    return found.groupby(level=0).first().reindex(series.index)
+
+
+def extract_years(series):
+    """extract_year() sur toute une colonne de descriptions HTML (Int64, <NA> si absent)."""
+    series = series.fillna("").astype(str)
+    years = _first_in_range(series, MONTH_RE)
+    return years.fillna(_first_in_range(series, EN_RE)).astype("Int64")
+
+
+def year_ranges(series):
+    """year_range() sur toute une colonne : DataFrame start_year / end_year (Int64)."""
+    import pandas as pd
+
+    cleaned = (series.fillna("").astype(str)
+               .str.replace(DAY_RE, " ", regex=True)
+               .str.replace(ABBR_RANGE_RE, _expand_range, regex=True))
+    years = cleaned.str.extractall(YEAR_RE)[0].astype(int)
+    years = years[(years >= MIN_YEAR) & (years <= MAX_YEAR)]
+    rows = years.index.get_level_values(0)
+    has_long = pd.Series(years.values >= 100, index=rows).groupby(level=0).transform("any").values
+    years = years[(years.values >= 100) | ~has_long].groupby(level=0)
+    century = cleaned.str.extract(CENTURY_RE)[0].astype(float)
+    start = years.min().reindex(cleaned.index).fillna((century - 1) * 100 + 1)
+    end = years.max().reindex(cleaned.index).fillna(century * 100)
+    return pd.DataFrame({"start_year": start.astype("Int64"), "end_year": end.astype("Int64")})
+
+
+def sort_key(start: int | None, end: int | None) -> tuple:
+    return (start if start is not None else 999999, end if end is not None else 999999)
+
+
+if __name__ == "__main__":
+    import json
+    from time import perf_counter
+    import pandas as pd
+
+    MARIAL_FILE = "src_files/marial.json"
+    EVENTS_FILE = "event_data/all_event.json"
+
+    def legacy_extract_year(html: str) -> int | None:
+        # version d'origine de merge_with_ia.py : motif reconstruit à chaque appel
+        months = MONTHS_FR
+        month_pattern = r'(?i)\b(?:' + '|'.join(months) + r')\s+(\d{2,4})(?=[\s,])'
+        years = [int(y) for y in re.findall(month_pattern, html) if 10 <= int(y) <= 2100]
+        if years:
+            return years[0]
+        en_pattern = r'(?i)\ben\s+(\d{2,4})(?=[\s,])'
+        years = [int(y) for y in re.findall(en_pattern, html) if 10 <= int(y) <= 2100]
+        if years:
+            return years[0]
+        return None
+
+    def bench(name, func, repeat=5):
+        start = perf_counter()
+        for _ in range(repeat):
+            result = func()
+        print(f"{name:>40} : {(perf_counter() - start) / repeat * 1000:8.2f} ms")
+        return result
+
+    with open(MARIAL_FILE, "r", encoding="utf-8") as fd:
+        htmls = [ft["properties"]["html"] for ft in json.load(fd)["features"]]
+    with open(EVENTS_FILE, "r", encoding="utf-8") as fd:
+        dates = [e["date"] for e in json.load(fd)]
+    html_col = pd.Series(htmls)
+    date_col = pd.Series(dates)
+    print(f"{len(htmls)} descriptions, {len(dates)} dates")
+
+    legacy = bench("extract_year d'origine", lambda: [legacy_extract_year(h) for h in htmls])
+    scalar = bench("extract_year précompilé", lambda: [extract_year(h) for h in htmls])
+    column = bench("extract_years (colonne pandas)", lambda: extract_years(html_col))
+    print(f"{'':>40}   résultats identiques : {legacy == scalar == [None if pd.isna(y) else int(y) for y in column]}")
+
+    bench("extract_year_after_comma", lambda: [extract_year_after_comma(d) for d in dates])
+    ranges = bench("year_range", lambda: [year_range(d) for d in dates])
+    frame = bench("year_ranges (colonne pandas)", lambda: year_ranges(date_col))
+    same = ranges == [(None if pd.isna(s) else int(s), None if pd.isna(e) else int(e))
+                      for s, e in zip(frame["start_year"], frame["end_year"])]
+    print(f"{'':>40}   résultats identiques : {same}")
+    print(f"{'':>40}   dates sans année : {sum(1 for r in ranges if r[0] is None)}")
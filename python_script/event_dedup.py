@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import math
+import re
+import unicodedata
+from collections import deque
+from difflib import SequenceMatcher
+
+YEAR_TOLERANCE = 1      # 958 / 959 : même événement daté différemment
+CELL_DEG = 0.05         # ~5 km : les voisins à moins de MAX_KM sont dans les 3x3 cases autour
+MAX_KM = 2.0            # même lieu, quel que soit le nom (« Mayence » / « Mainz »)
+NAME_MAX_KM = 25.0      # nom presque identique et lieu proche (ou coordonnées absentes)
+NAME_SIMILARITY = 0.85
+MIN_SHARED_GRAMS = 0.5  # Dice sur les trigrammes avant le calcul, plus coûteux, de SequenceMatcher
+
+
+def fold_place(place: str | None) -> str:
+    # "Monte Vergine (Campania/Italy)" -> "monte vergine"
+    text = unicodedata.normalize("NFKD", (place or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"\(.*?\)|[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def trigrams(name: str) -> set:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def distance_km(a: tuple, b: tuple) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+def _coords(record: dict) -> tuple | None:
+    try:
+        return float(record["latitude"]), float(record["longitude"])
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+class _Pending:
+    def __init__(self, year: int, record: dict, seq: int):
+        self.seq = seq  # rang d'arrivée dans le flux
+        self.year = year
+        self.record = record
+        self.coords = _coords(record)
+        self.name = fold_place(record.get("place"))
+        self.grams = trigrams(self.name) if self.name else set()
+        self.sources = {record.get("lang")}
+        self.blocks = []
+
+
+class EventDeduper:
+    """
+    Fusionne les doublons probables d'un flux d'événements trié par année de
+    début. Les enregistrements ne sont comparés qu'à ceux de leurs blocs :
+    (année, case de grille) pour la proximité, (année, trigramme du nom) pour
+    l'orthographe. Un enregistrement sort du tampon dès qu'aucun suivant ne
+    peut plus avoir une année compatible : le coût reste quasi linéaire.
+    """
+    def __init__(self, cross_source_only: bool = True):
+        self.cross_source_only = cross_source_only
+        self.blocks = {}
+        self.pending = deque()
+        self.merged = 0
+        self._seq = 0
+
+    def _block_keys(self, year: int, entry: _Pending, lookup: bool) -> list:
+        years = range(year - YEAR_TOLERANCE, year + YEAR_TOLERANCE + 1) if lookup else (year,)
+        keys = []
+        if entry.coords is not None:
+            row, col = int(entry.coords[0] // CELL_DEG), int(entry.coords[1] // CELL_DEG)
+            cells = [(row + i, col + j) for i in (-1, 0, 1) for j in (-1, 0, 1)] if lookup else [(row, col)]
+            keys += [("cell", y, cell) for y in years for cell in cells]
+        keys += [("name", y, gram) for y in years for gram in entry.grams]
+        return keys
+
+    def _is_duplicate(self, a: _Pending, b: _Pending, shared: int) -> bool:
+        if self.cross_source_only and a.sources & b.sources:
+            return False
+        distance = distance_km(a.coords, b.coords) if a.coords and b.coords else None
+        if distance is not None and distance <= MAX_KM:
+            return True
+        if distance is not None and distance > NAME_MAX_KM:
+            return False
+        if not a.grams or not b.grams or 2 * shared / (len(a.grams) + len(b.grams)) < MIN_SHARED_GRAMS:
+            return False
+        return SequenceMatcher(None, a.name, b.name).ratio() >= NAME_SIMILARITY
+
+    def _find(self, entry: _Pending) -> _Pending | None:
+        candidates = {}
+        shared = {}
+        for key in self._block_keys(entry.year, entry, lookup=True):
+            for candidate in self.blocks.get(key, ()):
+                candidates[id(candidate)] = candidate
+                if key[0] == "name":
+                    shared[id(candidate)] = shared.get(id(candidate), 0) + 1
+        # ordre d'arrivée : le plus ancien doublon possible garde l'enregistrement
+        for key, candidate in sorted(candidates.items(), key=lambda item: item[1].seq):
+            if self._is_duplicate(candidate, entry, shared.get(key, 0)):
+                return candidate
+        return None
+
+    def _absorb(self, kept: _Pending, other: _Pending):
+        record, extra = kept.record, other.record
+        for field, value in extra.items():
+            if record.get(field) in (None, "", []) and value not in (None, "", []):
+                record[field] = value
+        record["links"] = list(dict.fromkeys((record.get("links") or []) + (extra.get("links") or [])))
+        record.setdefault("merged_from", []).append(
+            {k: extra.get(k) for k in ("lang", "place", "date", "latitude", "longitude")})
+        kept.sources |= other.sources
+        self.merged += 1
+
+    def _flush(self, before: int | None):
+        while self.pending and (before is None or self.pending[0].year < before):
+            entry = self.pending.popleft()
+            for key in entry.blocks:
+                self.blocks[key].remove(entry)
+                if not self.blocks[key]:
+                    del self.blocks[key]
+            yield entry.record
+
+    def run(self, items):
+        """items : (année de début ou None, enregistrement), triés par année."""
+        for year, record in items:
+            if year is None:
+                # sans année, pas de comparaison fiable : l'enregistrement passe tel quel
+                yield from self._flush(None)
+                yield record
+                continue
+            yield from self._flush(year - YEAR_TOLERANCE)
+            entry = _Pending(year, record, self._seq)
+            self._seq += 1
+            match = self._find(entry)
+            if match is not None:
+                self._absorb(match, entry)
+                continue
+            entry.blocks = self._block_keys(year, entry, lookup=False)
+            for key in entry.blocks:
+                self.blocks.setdefault(key, []).append(entry)
+            self.pending.append(entry)
+        yield from self._flush(None)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import json
+import tempfile
+from array import array
+
+from date_extract import extract_year, year_range, sort_key
+from event_dedup import EventDeduper
+from json_stream import iter_json_array, JsonArrayWriter
+
+MARIAL_FILE = "src_files/marial.json"
+EVENTS_FILE = "event_data/all_event.json"
+OUTPUT_FILE = "merged.json"
+APPARITION = "Apparation of the virgin Mary"
+NO_YEAR = sort_key(None, None)[0]
+
+
+def _none_if_empty(value):
+    return value if value != "" else None
+
+
+# --- sorties de scrap.py / scraplast.py vers le format intermédiaire (all_event.json) ---
+
+def scrap_events(entries):
+    for entry in entries:
+        yield {
+            "type": APPARITION,
+            "date": entry["date"],
+            "place": entry["place"],
+            "visionary": entry["visionary"],
+            "title": entry["title"],
+            "description": entry["description"],
+            "feast": entry["feast"],
+            "commemorated": entry["commemorated"],
+            "source": entry["source"],
+            "peple_involved": "",
+            "approval": "",
+            "links": entry["links"],
+        }
+
+
+def scrap_last_events(entries):
+    for entry in entries:
+        yield {
+            "type": APPARITION,
+            "date": entry["date"],
+            "place": entry["place"],
+            "visionary": "",
+            "title": "",
+            "description": "",
+            "feast": "",
+            "commemorated": "",
+            "source": "",
+            "peple_involved": entry["People Involved"],
+            "approval": entry["Approval of Supernatural character"],
+            "links": entry["links"],
+        }
+
+
+# --- sources vers le schéma final : (clé de tri, enregistrement) ---
+
+def marial_records(features):
+    for feature in features:
+        pr = feature["properties"]
+        lng, lat = feature["geometry"]["coordinates"][:2]
+        date = extract_year(pr["html"])
+        yield (date, date), {
+            "type": [APPARITION],
+            "date": str(date) if date is not None else None,
+            "place": _none_if_empty(pr["fr"]),
+            "latitude": _none_if_empty(lat),
+            "longitude": _none_if_empty(lng),
+            "title": None,
+            "description": _none_if_empty(pr["html"]),
+            "visionaries": None,
+            "approval": None,
+            "commemorated": None,
+            "source": None,
+            "links": [],
+            "lang": "fr"
+        }
+
+
+def event_records(events):
+    for data in events:
+        feast = _none_if_empty(data["feast"])
+        visionaries = data["visionary"] if data["visionary"] != "" else _none_if_empty(data["peple_involved"])
+        yield year_range(data["date"]), {
+            "type": [data["type"]],
+            "date": _none_if_empty(data["date"]),
+            "place": _none_if_empty(data["place"]),
+            "latitude": _none_if_empty(data.get("latitude")),
+            "longitude": _none_if_empty(data.get("longitude")),
+            "title": _none_if_empty(data["title"]),
+            "description": _none_if_empty(data["description"]),
+            "visionaries": visionaries,
+            "approval": _none_if_empty(data["approval"]),
+            "commemorated": feast if feast is not None else _none_if_empty(data["commemorated"]),
+            "source": _none_if_empty(data["source"]),
+            "links": data["links"],
+            "lang": "en"
+        }
+
+
+def merge(sources, output: str, jsonl: bool = False, indent: int | None = 4, dedup: bool = False) -> int:
+    """
+    Une seule passe sur les sources (générateurs de (clé, enregistrement)) :
+    chaque enregistrement est écrit dans un fichier temporaire, seules sa clé
+    de tri et sa position restent en mémoire dans des tableaux compacts. Les
+    enregistrements sont ensuite relus un par un dans l'ordre trié (stable),
+    en passant par EventDeduper si dedup est vrai.
+    """
+    keys = array("q")
+    offsets = array("q")
+    with tempfile.TemporaryFile() as spool:
+        for source in sources:
+            for (start, end), record in source:
+                start, end = sort_key(start, end)
+                keys.append(start * 1_000_000 + end)
+                offsets.append(spool.tell())
+                spool.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+
+        def sorted_records():
+            for i in order:
+                start = keys[i] // 1_000_000
+                spool.seek(offsets[i])
+                yield (start if start != NO_YEAR else None), json.loads(spool.readline())
+
+        if dedup:
+            deduper = EventDeduper()
+            records = deduper.run(sorted_records())
+        else:
+            records = (record for _, record in sorted_records())
+        count = 0
+        if jsonl:
+            with open(output, "w", encoding="utf-8") as fd:
+                for record in records:
+                    fd.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+        else:
+            with JsonArrayWriter(output, indent=indent) as writer:
+                for record in records:
+                    writer.write(record)
+            count = writer.count
+        if dedup:
+            print(f"{deduper.merged} doublons fusionnés")
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fusionne les événements en un seul fichier trié par date")
+    parser.add_argument("-m", "--marial", default=MARIAL_FILE, help="FeatureCollection marial (français)")
+    parser.add_argument("-e", "--events", default=EVENTS_FILE, help="événements au format all_event.json")
+    parser.add_argument("-s", "--scrap", help="sortie de scrap.py (à la place de --events)")
+    parser.add_argument("-l", "--scrap-last", help="sortie de scraplast.py (à la place de --events)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("--jsonl", action="store_true", help="un enregistrement par ligne")
+    parser.add_argument("--compact", action="store_true", help="JSON sans indentation")
+    parser.add_argument("--no-dedup", action="store_true", help="garde les doublons entre sources")
+    args = parser.parse_args()
+
+    sources = [marial_records(iter_json_array(args.marial, key="features"))]
+    if args.scrap or args.scrap_last:
+        if args.scrap:
+            sources.append(event_records(scrap_events(iter_json_array(args.scrap))))
+        if args.scrap_last:
+            sources.append(event_records(scrap_last_events(iter_json_array(args.scrap_last))))
+    else:
+        sources.append(event_records(iter_json_array(args.events)))
+    count = merge(sources, args.output, jsonl=args.jsonl, indent=None if args.compact else 4,
+                  dedup=not args.no_dedup)
+    print(f"{count} événements écrits dans {args.output}")
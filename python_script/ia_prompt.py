@@ -1,30 +1,9 @@
 #!/usr/bin/env python3
-import pandas as pd
-import argparse
-from os.path import isfile
-
-parser = argparse.ArgumentParser()
-parser.add_argument("-f", "--file")
-parser.add_argument("-s", "--start")
-
-args = parser.parse_args()
-try:
-    if args.start == None:
-        start = 0
-    else:
-        start = int(args.start)
-except:
-    parser.exit(84, "Start must be an integer\n")
-filename = args.file
-if filename == None or not isfile(filename):
-    parser.exit(84, "The file doesn't exist\n")
-
 from os import getenv
 from groq import Groq
 from dotenv import load_dotenv
 import json
-
-load_dotenv()
+from llm_cache import LLMCache
 
 models = [
     # "llama-3.1-8b-instant",
@@ -33,6 +12,20 @@ models = [
     "openai/gpt-oss-20b",
 ]
 
+WEATHER_KEYS = ["rain", "snow", "wind", "fog", "storm", "night"]
+
+INSTRUCTIONS = """Consignes :
+        - rain: présence de pluie, averses, ou précipitations liquides
+        - snow: présence de neige ou précipitations neigeuses
+        - wind: présence de vent notable (pas juste une brise légère)
+        - fog: présence de brouillard, brume épaisse, ou visibilité réduite
+        - storm: présence d'orage, tempête, conditions violentes
+        - night: le contexte indique clairement un moment nocturne (nuit explicite, heures nocturnes, ambiance nocturne décrite)
+
+        Pour "night", sois conservateur : ne le marquer true que si le contexte temporel nocturne est clair.
+        Pour les autres, tu peux inférer même si ce n'est pas dit littéralement.
+"""
+
 class WeatherInfo:
     def __init__(self, rain=False, snow=False,
                  wind=False, fog=False, storm=False, night=False):
@@ -50,19 +43,16 @@ class WeatherInfo:
         infos = [f"{key}: {value}" for key, value in vars(self).items()]
         return ", ".join(infos)
 
-def extract_weather(text: str, client: Groq, index) -> WeatherInfo:
-    prompt = f"""Analyse le texte suivant et identifie les conditions atmosphériques et temporelles présentes ou fortement suggérées.
-        Consignes :
-        - rain: présence de pluie, averses, ou précipitations liquides
-        - snow: présence de neige ou précipitations neigeuses
-        - wind: présence de vent notable (pas juste une brise légère)
-        - fog: présence de brouillard, brume épaisse, ou visibilité réduite
-        - storm: présence d'orage, tempête, conditions violentes
-        - night: le contexte indique clairement un moment nocturne (nuit explicite, heures nocturnes, ambiance nocturne décrite)
-
-        Pour "night", sois conservateur : ne le marquer true que si le contexte temporel nocturne est clair.
-        Pour les autres, tu peux inférer même si ce n'est pas dit littéralement.
+def strip_markdown(response: str) -> str:
+    if response.startswith("```"):
+        response = response.split("```")[1]
+        if response.startswith("json"):
+            response = response[4:]
+        response = response.strip()
+    return response
 
+WEATHER_PROMPT = """Analyse le texte suivant et identifie les conditions atmosphériques et temporelles présentes ou fortement suggérées.
+        {instructions}
         Réponds UNIQUEMENT avec un objet JSON valide (pas de markdown, pas d'explication).
         {{
             "rain": true/false,
@@ -74,55 +64,244 @@ def extract_weather(text: str, client: Groq, index) -> WeatherInfo:
         }}
     Texte à analyser : "{text}"
     """
+# identifiants du cache : une modification du prompt ou des modèles invalide les résultats
+CACHE_TEMPLATE = WEATHER_PROMPT + INSTRUCTIONS
+CACHE_MODEL = ",".join(models)
+DEFERRED_FILE = "ex_deferred.csv"
+
+def validate_weather(data) -> dict | None:
+    """
+    Réponse unitaire exploitable : un objet avec exactement les clés de
+    WEATHER_KEYS, toutes booléennes. Sinon None, qui n'est jamais mis en cache.
+    """
+    if not isinstance(data, dict) or set(data) != set(WEATHER_KEYS):
+        return None
+    if not all(isinstance(data[key], bool) for key in WEATHER_KEYS):
+        return None
+    return {key: data[key] for key in WEATHER_KEYS}
 
+def request_weather(text: str, client: Groq, index) -> dict | None:
     completion = client.chat.completions.create(
         model=models[index % len(models)],
         messages=[
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": WEATHER_PROMPT.format(instructions=INSTRUCTIONS, text=text)}
         ],
         temperature=0.1
     )
-    response = completion.choices[0].message.content.strip()
-    if response.startswith("```"):
-        response = response.split("```")[1]
-        if response.startswith("json"):
-            response = response[4:]
-        response = response.strip()
+    response = strip_markdown(completion.choices[0].message.content.strip())
 
     try:
-        weather_data = json.loads(response)
-        return WeatherInfo(**weather_data)
+        weather_data = validate_weather(json.loads(response))
     except json.JSONDecodeError as e:
         print(f"Erreur lors du parsing JSON : {e}")
         print(f"Réponse reçue : {response}")
-        return WeatherInfo()
+        return None
+    if weather_data is None:
+        print(f"Réponse inexploitable : {response}")
+    return weather_data
+
+def extract_weather(text: str, client: Groq, index, cache: LLMCache | None = None) -> WeatherInfo:
+    if cache is not None:
+        weather_data = cache.cached_call(CACHE_TEMPLATE, CACHE_MODEL, text,
+                                         lambda: request_weather(text, client, index),
+                                         validate=validate_weather)
+    else:
+        weather_data = request_weather(text, client, index)
+    return WeatherInfo(**weather_data) if weather_data is not None else WeatherInfo()
+
+def parse_weather_batch(response: str, ids: list) -> dict:
+    """
+    Valide la réponse d'un lot : tableau JSON d'objets {"id", rain..night}.
+    Les objets invalides ou dont l'id n'est pas attendu sont ignorés.
+    """
+    try:
+        items = json.loads(strip_markdown(response))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+    expected = set(ids)
+    results = {}
+    for item in items:
+        if not isinstance(item, dict) or str(item.get("id")) not in expected:
+            continue
+        if not all(isinstance(item.get(key), bool) for key in WEATHER_KEYS):
+            continue
+        results[str(item["id"])] = WeatherInfo(**{key: item[key] for key in WEATHER_KEYS})
+    return results
+
+def classify_batch(verses: list, client: Groq, index) -> dict:
+    """
+    Classe plusieurs versets en une seule requête. `verses` est une liste de
+    (id, texte) ; retourne {id: WeatherInfo}, ou None pour un verset dont la
+    réponse est restée inexploitable. Les versets absents ou mal formés de la
+    réponse sont renvoyés en deux sous-lots, jusqu'au verset seul qui repasse
+    par le prompt unitaire.
+    """
+    if len(verses) == 1:
+        verse_id, text = verses[0]
+        weather_data = request_weather(text, client, index)
+        return {verse_id: WeatherInfo(**weather_data) if weather_data is not None else None}
+    payload = json.dumps([{"id": verse_id, "texte": text} for verse_id, text in verses], ensure_ascii=False)
+    prompt = f"""Analyse chacun des textes suivants et identifie les conditions atmosphériques et temporelles présentes ou fortement suggérées.
+        {INSTRUCTIONS}
+        Réponds UNIQUEMENT avec un tableau JSON valide (pas de markdown, pas d'explication),
+        avec exactement un objet par texte, en reprenant son "id" :
+        [{{"id": "...", "rain": true/false, "snow": true/false, "wind": true/false, "fog": true/false, "storm": true/false, "night": true/false}}]
+    Textes à analyser : {payload}
+    """
+    completion = client.chat.completions.create(
+        model=models[index % len(models)],
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1
+    )
+    results = parse_weather_batch(completion.choices[0].message.content.strip(), [v[0] for v in verses])
+    missing = [v for v in verses if v[0] not in results]
+    if missing:
+        print(f"\nLot incomplet : {len(missing)}/{len(verses)} versets relancés")
+        half = (len(missing) + 1) // 2
+        for part in (missing[:half], missing[half:]):
+            if part:
+                results.update(classify_batch(part, client, index + 1))
+    return results
+
+def extract_weather_batch(verses: list, client: Groq, index, cache: LLMCache | None = None) -> dict:
+    """
+    Comme classify_batch(), mais seuls les textes absents du cache sont
+    envoyés, une seule fois chacun même s'ils apparaissent plusieurs fois.
+    """
+    results = {}
+    todo = {}
+    for verse_id, text in verses:
+        weather_data = cache.get(CACHE_TEMPLATE, CACHE_MODEL, text, validate_weather) if cache is not None else None
+        if weather_data is not None:
+            results[verse_id] = WeatherInfo(**weather_data)
+        else:
+            todo.setdefault(text, []).append(verse_id)
+    if todo:
+        unique = [(str(n), text) for n, text in enumerate(todo)]
+        classified = classify_batch(unique, client, index)
+        for n, text in unique:
+            weather = classified[n]
+            if weather is not None and cache is not None:
+                cache.put(CACHE_TEMPLATE, CACHE_MODEL, text, vars(weather))
+            for verse_id in todo[text]:
+                results[verse_id] = weather if weather is not None else WeatherInfo()
+    return results
 
-client = Groq(api_key=getenv("AI_API_KEY"))
+def format_line(row, weather: WeatherInfo) -> str:
+    return "|".join([row["t"], "%s %s,%s" % (row["livre"], row["chapitre"], row["verset"]),
+                     row["texte"], weather.get_weather_str()])
 
-csv = pd.read_csv(filename, delimiter='|', encoding="utf-8")
-csv.info()
 
-# print("t|bible reference|texte|rain|snow|wind|fog|storm|night")
-from time import sleep
-file = open("ex.csv", "a", encoding="utf-8")
-i=0
-while True:
+if __name__ == "__main__":
+    import pandas as pd
+    import argparse
+    from os.path import isfile
+    from time import sleep
+    from llm_pool import LLMPool
+    from weather_prefilter import is_candidate
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file")
+    parser.add_argument("-s", "--start")
+    parser.add_argument("-b", "--batch", type=int, default=1,
+                        help="nombre de versets envoyés par requête")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="requêtes envoyées en parallèle")
+    parser.add_argument("--no-cache", action="store_true", help="ignorer le cache des réponses")
+    parser.add_argument("-p", "--prefilter", action="store_true",
+                        help="traiter d'abord les versets avec mot-clé météo ou nocturne, les autres sont "
+                             "reportés dans " + DEFERRED_FILE + " (aucune requête économisée)")
+
+    args = parser.parse_args()
     try:
-        for i, row in csv.iloc[start:].iterrows():
-            testement = row["t"]
-            book = row["livre"]
-            chapter = row["chapitre"]
-            verse = row["verset"]
-            texte = row["texte"]
-            weather = extract_weather(text=texte, client=client, index=i)
-            end_str = "|".join([testement, "%s %s,%s" % (book, chapter, verse),
-                        texte, weather.get_weather_str()])
-            file.write(end_str + "\n")
-            print("\rprocessing...%d/%d" % (i+1, len(csv)), end="")
-        print("\nDone !")
-        break
-    except Exception as e:
-        start=i
-        sleep(2)
-print("")
-file.close()
+        if args.start == None:
+            start = 0
+        else:
+            start = int(args.start)
+    except:
+        parser.exit(84, "Start must be an integer\n")
+    filename = args.file
+    if filename == None or not isfile(filename):
+        parser.exit(84, "The file doesn't exist\n")
+
+    load_dotenv()
+    client = Groq(api_key=getenv("AI_API_KEY"))
+
+    csv = pd.read_csv(filename, delimiter='|', encoding="utf-8")
+    csv.info()
+
+    # print("t|bible reference|texte|rain|snow|wind|fog|storm|night")
+    file = open("ex.csv", "a", encoding="utf-8")
+    cache = None if args.no_cache else LLMCache()
+
+    # le filtre ne voit que les mots-clés et garde 72 % des versets positifs de
+    # meteo_bible.csv ; la sûreté d'un rejet n'y est pas mesurable (aucun verset
+    # négatif). Un verset écarté n'est donc jamais étiqueté sans le modèle : -p
+    # ne fait que le reporter, au format d'entrée, pour un passage sans -p.
+    deferred = None
+    if args.prefilter:
+        new_file = not isfile(DEFERRED_FILE)
+        deferred = open(DEFERRED_FILE, "a", encoding="utf-8")
+        if new_file:
+            deferred.write("|".join(csv.columns) + "\n")
+    skipped = 0  # compté ici, dans le thread principal, à l'écriture
+    total = len(csv) - start
+
+    def classify(rows, n):
+        # None : verset reporté par le filtre
+        weathers = {str(j): None for j, row in rows.iterrows()
+                    if args.prefilter and not is_candidate(row["texte"])}
+        verses = [(str(j), row["texte"]) for j, row in rows.iterrows() if str(j) not in weathers]
+        if args.batch > 1 and verses:
+            weathers.update(extract_weather_batch(verses, client, rows.index[0] // args.batch, cache))
+        else:
+            for j, text in verses:
+                weathers[j] = extract_weather(text=text, client=client, index=int(j), cache=cache)
+        return [weathers[str(j)] for j in rows.index]
+
+    if args.workers > 1:
+        client = LLMPool(client, models, workers=args.workers)
+    # une "vague" = un lot par worker ; elle est écrite dans l'ordre une fois terminée
+    step = max(1, args.batch)
+    wave = step * max(1, args.workers)
+    i=start
+    while True:
+        try:
+            for first in range(start, len(csv), wave):
+                i = first
+                chunk = csv.iloc[first:first + wave]
+                groups = [chunk.iloc[k:k + step] for k in range(0, len(chunk), step)]
+                if args.workers > 1:
+                    results = client.map(classify, groups)
+                else:
+                    results = [classify(rows, n) for n, rows in enumerate(groups)]
+                for rows, weathers in zip(groups, results):
+                    for (_, row), weather in zip(rows.iterrows(), weathers):
+                        if weather is None:
+                            deferred.write("|".join(str(row[c]) for c in csv.columns) + "\n")
+                            skipped += 1
+                        else:
+                            file.write(format_line(row, weather) + "\n")
+                file.flush()
+                if deferred is not None:
+                    deferred.flush()
+                print("\rprocessing...%d/%d" % (first + len(chunk), len(csv)), end="")
+            print("\nDone !")
+            break
+        except Exception as e:
+            start=i
+            sleep(2)
+    print("")
+    file.close()
+    if deferred is not None:
+        deferred.close()
+        rate = skipped / total if total else 0.0
+        print(f"{skipped}/{total} versets sans mot-clé ({rate:.1%}) reportés dans {DEFERRED_FILE}, "
+              f"à envoyer au modèle sans -p")
+    if cache is not None:
+        cache.report()
+        cache.close()
@@ -0,0 +1,117 @@
+import json
+import os
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+def _seek_key(fd, key: str, chunk_size: int) -> str:
+    # avance jusqu'au '[' qui suit "key" et retourne le reste du tampon
+    needle = f'"{key}"'
+    buffer = ""
+    while True:
+        chunk = fd.read(chunk_size)
+        if not chunk:
+            raise ValueError(f'clé "{key}" introuvable')
+        buffer += chunk
+        found = buffer.find(needle)
+        if found >= 0:
+            bracket = buffer.find("[", found)
+            if bracket >= 0:
+                return buffer[bracket:]
+            continue
+        buffer = buffer[-len(needle):]
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE, key: str | None = None):
+    """
+    Lit un fichier contenant un tableau JSON élément par élément, sans charger
+    tout le tableau en mémoire : seul le texte de l'élément en cours est gardé.
+    Avec key, lit le tableau de cette clé ("features" d'une FeatureCollection).
+    """
+    with open(path, "r", encoding="utf-8") as fd:
+        buffer = _seek_key(fd, key, chunk_size) if key else ""
+        eof = False
+        started = False
+        pos = 0
+        while True:
+            # saute les blancs, le '[' initial et les virgules
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or
+                                         (not started and buffer[pos] == "[")):
+                started = started or buffer[pos] == "["
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+                # un nombre en fin de tampon peut être coupé ("2." de "2.5") :
+                # on ne l'accepte que suivi d'un séparateur
+                if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                    raise ValueError
+            except ValueError:
+                if eof:
+                    # fin de fichier avant le ']' final : sortie partielle d'un écrivain interrompu
+                    raise ValueError(f"JSON tronqué dans {path}")
+                chunk = fd.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield value
+            pos = end
+
+
+def iter_jsonl(path: str):
+    """Lignes d'un journal JSONL ; une dernière ligne tronquée par un crash est ignorée."""
+    with open(path, "r", encoding="utf-8") as fd:
+        for line in fd:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class JsonArrayWriter:
+    """
+    Écrit un tableau JSON élément par élément, au même format que json.dump(indent=4).
+    Le fichier temporaire ne remplace path qu'à la fermeture sans erreur.
+    """
+    def __init__(self, path: str, indent: int | None = 4):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.fd = open(self.tmp_path, "w", encoding="utf-8")
+        self.indent = indent
+        self.count = 0
+
+    def write(self, item):
+        text = json.dumps(item, ensure_ascii=False, indent=self.indent)
+        if self.indent is None:
+            separator = "[" if self.count == 0 else ","
+        else:
+            text = "\n".join(" " * self.indent + line for line in text.split("\n"))
+            separator = "[\n" if self.count == 0 else ",\n"
+        self.fd.write(separator + text)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.fd.write("[]")
+        else:
+            self.fd.write("\n]" if self.indent is not None else "]")
+        self.fd.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.fd.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from time import time
+
+CACHE_FILE = "llm_cache.sqlite"
+
+
+def cache_key(template: str, model: str, text: str) -> str:
+    h = hashlib.sha256()
+    for part in (template, model, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class LLMCache:
+    """
+    Cache des réponses déjà analysées (WeatherInfo, nom de lieu corrigé),
+    indexé par le hash du template de prompt, du modèle et du texte. Un texte
+    déjà vu, dans ce lancement ou un précédent, ne repart pas vers l'API.
+    """
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, template: str, model: str, text: str, validate=None):
+        """
+        Valeur en cache, ou None. validate(valeur) retourne la valeur nettoyée
+        ou None : une entrée refusée (écrite par une version antérieure) compte
+        comme absente et sera remplacée.
+        """
+        key = cache_key(template, model, text)
+        with self._lock:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            value = json.loads(row[0]) if row is not None else None
+            if value is not None and validate is not None:
+                value = validate(value)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def put(self, template: str, model: str, text: str, value):
+        key = cache_key(template, model, text)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time())
+            )
+            self._db.commit()
+
+    def cached_call(self, template: str, model: str, text: str, compute, validate=None):
+        """
+        Retourne la valeur en cache ou appelle compute(). Deux threads qui
+        demandent le même texte en même temps ne font qu'un seul appel.
+        Une valeur None (réponse inexploitable) n'est pas mise en cache ;
+        validate filtre les valeurs lues comme les valeurs calculées.
+        """
+        key = cache_key(template, model, text)
+        with self._lock:
+            lock = self._pending.setdefault(key, threading.Lock())
+        with lock:
+            value = self.get(template, model, text, validate)
+            if value is None:
+                value = compute()
+                if value is not None and validate is not None:
+                    value = validate(value)
+                if value is not None:
+                    self.put(template, model, text, value)
+        with self._lock:
+            self._pending.pop(key, None)
+        return value
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        print(f"Cache LLM : {self.hits} hits, {self.misses} misses ({rate:.1f}% évités)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
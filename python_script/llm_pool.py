@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep, time
+from types import SimpleNamespace
+
+# limites par modèle : (requêtes/minute, tokens/minute)
+MODEL_LIMITS = {
+    "llama-3.1-8b-instant": (30, 6000),
+    "llama-3.3-70b-versatile": (30, 12000),
+    "openai/gpt-oss-120b": (30, 8000),
+    "openai/gpt-oss-20b": (30, 8000),
+}
+DEFAULT_LIMITS = (30, 6000)
+MAX_RETRIES = 6
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.last = monotonic()
+
+    def refill(self):
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self, amount: float) -> float:
+        self.refill()
+        amount = min(amount, self.capacity)
+        return 0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+
+class ModelLimiter:
+    """Budget requêtes/minute et tokens/minute d'un modèle, plus la pause imposée par un 429."""
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def wait_time(self, tokens: int) -> float:
+        with self.lock:
+            return max(self.blocked_until - monotonic(),
+                       self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def try_acquire(self, tokens: int) -> bool:
+        with self.lock:
+            if monotonic() < self.blocked_until:
+                return False
+            if self.requests.wait_time(1) or self.tokens.wait_time(tokens):
+                return False
+            self.requests.tokens -= 1
+            self.tokens.tokens -= min(tokens, self.tokens.capacity)
+            return True
+
+    def block(self, seconds: float):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+
+
+def estimate_tokens(messages: list) -> int:
+    # ~4 caractères par token, plus une marge pour la réponse
+    return sum(len(m["content"]) for m in messages) // 4 + 100
+
+
+def retry_after(error) -> float | None:
+    """Délai demandé par l'API sur un 429, None si l'erreur n'est pas un 429."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 2.0
+
+
+class LLMPool:
+    """
+    Enveloppe un client Groq : même interface chat.completions.create(),
+    mais chaque appel respecte les limites du modèle et réessaie sur un 429
+    (avec retry-after). Si le modèle demandé est en pause, un autre modèle
+    disponible de `models` est utilisé. map() lance les appels en parallèle
+    et rend les résultats dans l'ordre des entrées.
+    """
+    def __init__(self, client, models: list, workers: int = 8, limits: dict = MODEL_LIMITS):
+        self.client = client
+        self.models = models
+        self.workers = workers
+        self.limiters = {m: ModelLimiter(*limits.get(m, DEFAULT_LIMITS)) for m in models}
+        self.rate_limited = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _pick_model(self, wanted: str, tokens: int) -> str:
+        candidates = [wanted] + [m for m in self.models if m != wanted]
+        while True:
+            for model in candidates:
+                if self.limiters[model].try_acquire(tokens):
+                    return model
+            sleep(max(0.01, min(self.limiters[m].wait_time(tokens) for m in candidates)))
+
+    def create(self, model: str, messages: list, **kwargs):
+        tokens = estimate_tokens(messages)
+        for attempt in range(MAX_RETRIES):
+            chosen = self._pick_model(model, tokens)
+            try:
+                return self.client.chat.completions.create(model=chosen, messages=messages, **kwargs)
+            except Exception as e:
+                delay = retry_after(e)
+                if delay is None or attempt == MAX_RETRIES - 1:
+                    raise
+                self.rate_limited += 1
+                self.limiters[chosen].block(delay * (attempt + 1))
+
+    def map(self, func, items: list) -> list:
+        """func(item, index) pour chaque entrée, résultats dans l'ordre d'entrée."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(func, items, range(len(items))))
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry: float):
+        super().__init__(f"Rate limit reached, retry after {retry:.2f}s")
+        self.response = SimpleNamespace(headers={"retry-after": f"{retry:.2f}"})
+
+
+class FakeGroq:
+    """
+    Client local compatible Groq pour mesurer le débit sans réseau : latence
+    fixe, limite de requêtes/minute côté "serveur" renvoyant des 429, et
+    réponses plausibles pour les prompts de ia_prompt.py et correct_sentence.py.
+    """
+    def __init__(self, latency: float = 0.3, rpm: int = 60):
+        self.latency = latency
+        self.rpm = rpm
+        self.calls = 0
+        self.history = {}
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _answer(self, prompt: str) -> str:
+        if "Textes à analyser :" in prompt:
+            items = json.loads(prompt.split("Textes à analyser :", 1)[1].strip())
+            return json.dumps([{"id": it["id"], "rain": "pluie" in it["texte"], "snow": False, "wind": False,
+                                "fog": False, "storm": False, "night": "nuit" in it["texte"]} for it in items])
+        if "Texte à analyser :" in prompt:
+            text = prompt.split("Texte à analyser :", 1)[1]
+            return json.dumps({"rain": "pluie" in text, "snow": False, "wind": False,
+                               "fog": False, "storm": False, "night": "nuit" in text})
+        if 'Lieu : "' in prompt:
+            return prompt.split('Lieu : "', 1)[1].split('"', 1)[0]
+        return ""
+
+    def create(self, model: str, messages: list, **kwargs):
+        with self.lock:
+            now = time()
+            recent = [t for t in self.history.get(model, []) if now - t < 60]
+            if len(recent) >= self.rpm:
+                raise FakeRateLimitError(60 - (now - recent[0]))
+            recent.append(now)
+            self.history[model] = recent
+            self.calls += 1
+        sleep(self.latency)
+        content = self._answer(messages[-1]["content"])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=estimate_tokens(messages))
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    from ia_prompt import extract_weather, models
+
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne du pool avec FakeGroq")
+    parser.add_argument("-n", "--count", type=int, default=60)
+    parser.add_argument("-w", "--workers", type=int, default=8)
+    parser.add_argument("-l", "--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    verses = [f"Verset {i} : il tomba de la pluie pendant la nuit." if i % 3 == 0 else f"Verset {i}."
+              for i in range(args.count)]
+    # limites larges pour ne mesurer que la concurrence
+    limits = {m: (600, 600000) for m in models}
+
+    fake = FakeGroq(latency=args.latency, rpm=600)
+    start = time()
+    sequential = [extract_weather(text, fake, i) for i, text in enumerate(verses)]
+    seq_time = time() - start
+
+    pool = LLMPool(FakeGroq(latency=args.latency, rpm=600), models, workers=args.workers, limits=limits)
+    start = time()
+    concurrent = pool.map(lambda text, i: extract_weather(text, pool, i), verses)
+    pool_time = time() - start
+
+    same = [repr(w) for w in sequential] == [repr(w) for w in concurrent]
+    print(f"séquentiel : {args.count / seq_time:6.1f} requêtes/s ({seq_time:.2f}s)")
+    print(f"pool x{args.workers:<3} : {args.count / pool_time:6.1f} requêtes/s ({pool_time:.2f}s), "
+          f"ordre conservé : {same}, 429 reçus : {pool.rate_limited}")
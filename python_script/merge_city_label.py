@@ -3,25 +3,44 @@ import pandas as pd
 file1 = "../utils/city_label.csv"
 file2 = "src_files/maria_valtorta_parse_data.csv"
 
+# précision des coordonnées en dessous de laquelle deux points sont considérés identiques (~10 m)
+COORD_DECIMALS = 4
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    # même règle que normalize_place() : sans accents, espaces réduits, minuscules
+    return (names.fillna("").astype(str)
+            .str.normalize("NFKD")
+            .str.replace("[\u0300-\u036f]", "", regex=True)
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip()
+            .str.lower())
+
+
+def find_collisions(frame: pd.DataFrame) -> pd.DataFrame:
+    """Lignes dont le nom normalisé apparaît avec des coordonnées différentes."""
+    points = frame.assign(lat=frame["lat"].round(COORD_DECIMALS), long=frame["long"].round(COORD_DECIMALS))
+    distinct = points.drop_duplicates(["key", "lat", "long"])
+    counts = distinct["key"].value_counts()
+    return distinct[distinct["key"].isin(counts[counts > 1].index)].sort_values("key")
+
+
 csv1 = pd.read_csv(file1, delimiter=",", encoding="utf-8")
 csv2 = pd.read_csv(file2, delimiter=",", encoding="utf-8")
 
-ouput = {"long": [], "lat": [], "fr": [], "url": []}
+labels = pd.DataFrame({"long": csv1["long"], "lat": csv1["lat"], "fr": csv1["fr"], "url": ""})
+valtorta = pd.DataFrame({"long": csv2["longitude"], "lat": csv2["latitude"], "fr": csv2["name"], "url": csv2["url"]})
+labels["key"] = normalize_names(labels["fr"])
+valtorta["key"] = normalize_names(valtorta["fr"])
 
-names = [row["name"] for row in csv2.iloc]
+# anti-jointure par hachage : les labels déjà présents dans valtorta sont remplacés par ceux-ci
+kept = labels[~labels["key"].isin(pd.Index(valtorta["key"]))]
 
-for row in csv1.iloc:
-    if row["fr"] in names:
-        continue
-    ouput["lat"].append(row["lat"])
-    ouput["long"].append(row["long"])
-    ouput["fr"].append(row["fr"])
-    ouput["url"].append("")
+collisions = find_collisions(pd.concat([labels, valtorta], ignore_index=True))
+if len(collisions):
+    print(f"{collisions['key'].nunique()} noms avec des coordonnées différentes :")
+    print(collisions[["fr", "lat", "long", "url"]].to_string(index=False))
 
-for row in csv2.iloc:
-    ouput["lat"].append(row["latitude"])
-    ouput["long"].append(row["longitude"])
-    ouput["fr"].append(row["name"])
-    ouput["url"].append(row["url"])
-dt = pd.DataFrame(ouput)
+dt = pd.concat([kept, valtorta], ignore_index=True).drop(columns="key")
+print(f"{len(labels) - len(kept)} labels remplacés, {len(dt)} lignes écrites")
 dt.to_csv("merged_csv.csv", sep=",", index=False)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import argparse
+import sqlite3
+from os.path import isfile
+from time import perf_counter
+
+from http_cache import CACHE_FILE
+from scrap import BASEURL, find_rows, parseLine
+from table_extract import extract_rows, parse_fields, lxml
+
+
+def load_fixtures(files: list) -> list:
+    if files:
+        pages = []
+        for path in files:
+            with open(path, "r", encoding="utf-8") as fd:
+                pages.append(fd.read())
+        return pages
+    # par défaut : les pages déjà téléchargées par scrap.py
+    if not isfile(CACHE_FILE):
+        return []
+    db = sqlite3.connect(CACHE_FILE)
+    pages = [body for (body,) in db.execute("SELECT body FROM pages WHERE url LIKE '%apparitions_%'")]
+    db.close()
+    return pages
+
+
+def bench(name: str, func, pages: list, repeat: int) -> list:
+    start = perf_counter()
+    for _ in range(repeat):
+        results = [func(html) for html in pages]
+    elapsed = perf_counter() - start
+    print(f"{name:>22} : {len(pages) * repeat / elapsed:8.1f} pages/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", help="pages HTML sauvegardées (défaut : cache de scrap.py)")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.files)
+    if not pages:
+        parser.exit(84, "Aucune page HTML : lancer scrap.py une fois ou passer des fichiers\n")
+    print(f"{len(pages)} pages, {args.repeat} répétitions")
+
+    def before(html):
+        return [parseLine(row[2]) for row in find_rows(html)]
+
+    def after_soup(html):
+        return [parse_fields(row[2]) for row in extract_rows(html, 3, BASEURL, use_lxml=False)[1:]]
+
+    def after_lxml(html):
+        return [parse_fields(row[2]) for row in extract_rows(html, 3, BASEURL)[1:]]
+
+    reference = bench("avant (html.parser)", before, pages, args.repeat)
+    soup = bench("après (SoupStrainer)", after_soup, pages, args.repeat)
+    print(f"{'':>22}   résultats identiques : {soup == reference}")
+    if lxml is not None:
+        fast = bench("après (lxml)", after_lxml, pages, args.repeat)
+        print(f"{'':>22}   résultats identiques : {fast == reference}")
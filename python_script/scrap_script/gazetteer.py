@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import json
+import re
+from bisect import bisect_left
+
+from geocode_cache import normalize_place
+
+GAZETTEER_FILE = "gazetteer.json"
+SOURCES_CSV = [
+    # (fichier, colonne nom, colonne latitude, colonne longitude)
+    ("../../utils/city_label.csv", "fr", "lat", "long"),
+    ("../src_files/maria_valtorta_parse_data.csv", "name", "latitude", "longitude"),
+]
+SOURCES_GEOJSON = [
+    ("../../public/geoJson_files/city_label.geojson", "fr"),
+]
+
+
+def iter_csv(path: str, name_col: str, lat_col: str, lon_col: str):
+    with open(path, "r", encoding="utf-8") as fd:
+        for row in csv.DictReader(fd):
+            if row[name_col] and row[lat_col] and row[lon_col]:
+                yield row[name_col], float(row[lat_col]), float(row[lon_col])
+
+
+def iter_geojson(path: str, name_prop: str):
+    with open(path, "r", encoding="utf-8") as fd:
+        features = json.load(fd)["features"]
+    for ft in features:
+        name = ft["properties"].get(name_prop)
+        if name and ft["geometry"]["type"] == "Point":
+            lon, lat = ft["geometry"]["coordinates"][:2]
+            yield name, lat, lon
+
+
+def iter_geonames_dump(path: str, min_population: int = 0, alternate_names: bool = False):
+    """
+    Dump GeoNames (allCountries.txt, cities15000.txt...) : colonnes séparées
+    par des tabulations, nom en 1, noms alternatifs en 3, lat/lon en 4/5,
+    population en 14.
+    """
+    with open(path, "r", encoding="utf-8") as fd:
+        for line in fd:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            if int(cols[14] or 0) < min_population:
+                continue
+            lat, lon = float(cols[4]), float(cols[5])
+            yield cols[1], lat, lon
+            if alternate_names and cols[3]:
+                for alt in cols[3].split(","):
+                    yield alt, lat, lon
+
+
+def build_index(records) -> dict:
+    # premier arrivé, premier servi : les sources locales passent avant GeoNames
+    entries = {}
+    for name, lat, lon in records:
+        key = normalize_place(name)
+        if key and key not in entries:
+            entries[key] = (name, round(lat, 6), round(lon, 6))
+    keys = sorted(entries)
+    return {
+        "keys": keys,
+        "names": [entries[k][0] for k in keys],
+        "lat": [entries[k][1] for k in keys],
+        "lon": [entries[k][2] for k in keys],
+    }
+
+
+class Gazetteer:
+    def __init__(self, index: dict):
+        self.keys = index["keys"]
+        self.names = index["names"]
+        self.lat = index["lat"]
+        self.lon = index["lon"]
+        self._exact = {name: i for i, name in enumerate(self.names)}
+        self._folded = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_FILE) -> "Gazetteer":
+        with open(path, "r", encoding="utf-8") as fd:
+            return cls(json.load(fd))
+
+    def save(self, path: str = GAZETTEER_FILE):
+        index = {"keys": self.keys, "names": self.names, "lat": self.lat, "lon": self.lon}
+        with open(path, "w", encoding="utf-8") as fd:
+            json.dump(index, fd, ensure_ascii=False, separators=(",", ":"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _coords(self, i: int) -> tuple:
+        return self.lat[i], self.lon[i]
+
+    def exact(self, name: str) -> tuple | None:
+        i = self._exact.get(name)
+        return self._coords(i) if i is not None else None
+
+    def folded(self, name: str) -> tuple | None:
+        i = self._folded.get(normalize_place(name))
+        return self._coords(i) if i is not None else None
+
+    def prefix(self, name: str, limit: int = 10) -> list:
+        key = normalize_place(name)
+        results = []
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and len(results) < limit and self.keys[i].startswith(key):
+            results.append((self.names[i], *self._coords(i)))
+            i += 1
+        return results
+
+    def resolve(self, place: str, prefix: bool = False) -> tuple | None:
+        """
+        Résout un lieu d'événement ("Lourdes (France)", "Agde, Hérault, ...")
+        en essayant le nom complet puis le premier segment avant la
+        parenthèse ou la virgule. Le préfixe n'est utilisé que s'il est unique.
+        """
+        coords = self.exact(place) or self.folded(place)
+        if coords:
+            return coords
+        head = re.split(r"[(,]", place, maxsplit=1)[0].strip()
+        if head and head != place:
+            coords = self.folded(head)
+            if coords:
+                return coords
+        if prefix and head:
+            matches = self.prefix(head, limit=2)
+            if len(matches) == 1:
+                return matches[0][1:]
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", default=GAZETTEER_FILE)
+    parser.add_argument("-g", "--geonames", help="dump GeoNames optionnel (allCountries.txt...)")
+    parser.add_argument("--min-population", type=int, default=0)
+    parser.add_argument("--alternate-names", action="store_true")
+    args = parser.parse_args()
+
+    def all_records():
+        for path, *cols in SOURCES_CSV:
+            yield from iter_csv(path, *cols)
+        for path, prop in SOURCES_GEOJSON:
+            yield from iter_geojson(path, prop)
+        if args.geonames:
+            yield from iter_geonames_dump(args.geonames, args.min_population, args.alternate_names)
+
+    gazetteer = Gazetteer(build_index(all_records()))
+    gazetteer.save(args.output)
+    print(f"Gazetteer généré : {args.output} ({len(gazetteer)} lieux)")
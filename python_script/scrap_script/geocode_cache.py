@@ -0,0 +1,96 @@
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from time import time
+
+CACHE_FILE = "geocode_cache.sqlite"
+MISS_TTL = 7 * 24 * 3600 # les lieux non trouvés sont retentés après une semaine
+
+
+def normalize_place(place: str) -> str:
+    text = unicodedata.normalize("NFKD", place)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class CacheEntry:
+    def __init__(self, coords: tuple | None, raw, created: float):
+        self.coords = coords
+        self.raw = raw
+        self.created = created
+
+    @property
+    def hit(self) -> bool:
+        return self.coords is not None
+
+    def __repr__(self):
+        return f"CacheEntry(coords={self.coords}, created={self.created})"
+
+
+class GeocodeCache:
+    """
+    Cache disque partagé des géocodages, indexé par (provider, nom normalisé).
+    Les résultats trouvés sont conservés indéfiniment, les échecs expirent
+    après `miss_ttl` secondes.
+    """
+    def __init__(self, path: str = CACHE_FILE, miss_ttl: float = MISS_TTL):
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                provider TEXT NOT NULL,
+                place TEXT NOT NULL,
+                lat REAL,
+                lon REAL,
+                raw TEXT,
+                created REAL NOT NULL,
+                PRIMARY KEY (provider, place)
+            )
+        """)
+        self._db.commit()
+
+    def get(self, provider: str, place: str, stats: bool = True) -> CacheEntry | None:
+        key = normalize_place(place)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT lat, lon, raw, created FROM geocode WHERE provider = ? AND place = ?",
+                (provider, key)
+            ).fetchone()
+            # compteurs sous le verrou : get() est appelé depuis les threads du runner
+            if row is None or (row[0] is None and time() - row[3] > self.miss_ttl):
+                self.misses += stats
+                return None
+            self.hits += stats
+        lat, lon, raw, created = row
+        coords = (lat, lon) if lat is not None else None
+        return CacheEntry(coords, json.loads(raw) if raw else None, created)
+
+    def count_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def put(self, provider: str, place: str, coords: tuple | None, raw=None):
+        lat, lon = coords if coords else (None, None)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, normalize_place(place), lat, lon,
+                 json.dumps(raw, ensure_ascii=False) if raw is not None else None, time())
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from os.path import isfile
+from time import monotonic, sleep, time
+
+from geocode_cache import GeocodeCache, normalize_place
+
+INPUT_FILE = "event_without_coordinates.json"
+OUTPUT_FILE = "event_with_coordinates.json"
+NOT_FOUND_FILE = "not_found_places.json"
+JOURNAL_FILE = "geocode_journal.jsonl"
+
+# requêtes par seconde autorisées pour chaque provider
+RATE_LIMITS = {
+    "nominatim": 1.0,
+    "geonames": 2.0,
+    "stub": 50.0,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.last = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            sleep(wait)
+
+
+def stub_provider(place: str, cache: GeocodeCache | None = None, latency: float = 0.05) -> tuple | None:
+    """
+    Provider local sans réseau : coordonnées déterministes dérivées du nom,
+    environ un lieu sur dix n'est pas trouvé.
+    """
+    if cache is not None:
+        cached = cache.get("stub", place)
+        if cached is not None:
+            return cached.coords
+    sleep(latency)
+    h = zlib.crc32(place.encode("utf-8"))
+    coords = None
+    if h % 10 != 0:
+        coords = (h % 18000) / 100 - 90, (h // 18000 % 36000) / 100 - 180
+    if cache is not None:
+        cache.put("stub", place, coords, raw={"crc32": h})
+    return coords
+
+
+def get_provider(name: str):
+    if name == "stub":
+        return stub_provider
+    if name == "nominatim":
+        from get_coord_from_api import get_coords
+        return get_coords
+    if name == "geonames":
+        from get_coord_from_geonames import getLoc
+        return getLoc
+    raise ValueError(f"Provider inconnu : {name}")
+
+
+def load_journal(path: str) -> dict:
+    """
+    {nom normalisé: coords} des lieux déjà trouvés. Le journal est indexé par
+    le lieu et non par sa position : un fichier d'entrée régénéré ne décale
+    pas les résultats, et un même lieu n'est géocodé qu'une fois. Les échecs
+    n'y figurent pas (ceux d'anciens journaux sont ignorés) : ils sont
+    retentés, via le cache et son MISS_TTL.
+    """
+    done = {}
+    if not isfile(path):
+        return done
+    with open(path, "r", encoding="utf-8") as fd:
+        for line in fd:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # dernière ligne tronquée par un crash : on la refera
+                continue
+            if "place" in record and record["coords"]:  # anciennes lignes par position ou sans résultat
+                done[record["place"]] = record["coords"]
+    return done
+
+
+class GeocodeRunner:
+    def __init__(self, provider: str, workers: int = 4, rate: float | None = None,
+                 journal: str = JOURNAL_FILE, cache: GeocodeCache | None = None):
+        self.provider = provider
+        self.geocode = get_provider(provider)
+        self.workers = workers
+        self.bucket = TokenBucket(rate if rate is not None else RATE_LIMITS.get(provider, 1.0))
+        self.journal = journal
+        self.cache = cache
+        self._journal_lock = threading.Lock()
+
+    def _lookup(self, place: str) -> tuple | None:
+        if self.cache is not None:
+            # pas de jeton consommé pour un lieu déjà en cache
+            cached = self.cache.get(self.provider, place, stats=False)
+            if cached is not None:
+                self.cache.count_hit()
+                return cached.coords
+        self.bucket.acquire()
+        return self.geocode(place, self.cache)
+
+    def _process(self, key: str, place: str, fd):
+        try:
+            coords = self._lookup(place)
+        except Exception as e:
+            # pas journalisé : sera retenté au prochain lancement
+            print(f"Erreur pour {place}: {e}")
+            return
+        if coords is None:
+            # un lieu non trouvé n'est pas journalisé : le cache le garde MISS_TTL
+            # secondes, puis il est redemandé au provider
+            return
+        with self._journal_lock:
+            fd.write(json.dumps({"place": key, "coords": coords}, ensure_ascii=False) + "\n")
+            fd.flush()
+
+    def run(self, data: list) -> dict:
+        done = load_journal(self.journal)
+        todo = {}
+        for entry in data:
+            key = normalize_place(entry["place"])
+            if key not in done:
+                todo.setdefault(key, entry["place"])
+        print(f"{len(done)} déjà traités, {len(todo)} restants")
+        with open(self.journal, "a", encoding="utf-8") as fd:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for key, place in todo.items():
+                    pool.submit(self._process, key, place, fd)
+        return load_journal(self.journal)
+
+
+def _entry_key(entry: dict) -> str:
+    return json.dumps({k: v for k, v in entry.items() if k not in ("latitude", "longitude")},
+                      ensure_ascii=False, sort_keys=True)
+
+
+def compact(data: list, results: dict, output_file: str, not_found_file: str, out_dt: list | None = None):
+    """
+    Ajoute à out_dt (contenu actuel du fichier de sortie) les événements
+    trouvés qui n'y sont pas encore : relancer après un run complet ne
+    duplique rien. Seul le contenu existant sert de référence : deux
+    événements identiques de data sont gardés tous les deux.
+    """
+    out_dt = out_dt if out_dt is not None else []
+    present = {_entry_key(entry) for entry in out_dt}
+    none_file = []
+    for entry in data:
+        coord = results.get(normalize_place(entry["place"]))
+        if coord:
+            if _entry_key(entry) in present:
+                continue
+            out_dt.append({
+                **entry,
+                "latitude": coord[0],
+                "longitude": coord[1]
+            })
+        else:
+            none_file.append(entry)
+    with open(output_file, "w", encoding="utf-8") as fout:
+        json.dump(out_dt, fout, ensure_ascii=False, indent=4)
+    with open(not_found_file, "w", encoding="utf-8") as fout:
+        json.dump(none_file, fout, ensure_ascii=False, indent=4)
+    return len(out_dt), len(none_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", default=INPUT_FILE)
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("-p", "--provider", default="nominatim", choices=["nominatim", "geonames", "stub"])
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("-r", "--rate", type=float, help="requêtes par seconde")
+    parser.add_argument("-j", "--journal", default=JOURNAL_FILE)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if not isfile(args.file):
+        parser.exit(84, "The file doesn't exist\n")
+    with open(args.file, "r", encoding="utf-8") as fd:
+        data = json.load(fd)
+    out_dt = []
+    if isfile(args.output):
+        with open(args.output, "r", encoding="utf-8") as fd:
+            out_dt = json.load(fd)
+
+    cache = None if args.no_cache else GeocodeCache()
+    runner = GeocodeRunner(args.provider, workers=args.workers, rate=args.rate,
+                           journal=args.journal, cache=cache)
+    start = time()
+    results = runner.run(data)
+    elapsed = time() - start
+    found, not_found = compact(data, results, args.output, NOT_FOUND_FILE, out_dt)
+    print(f"{len(results)} lieux distincts traités pour {len(data)} événements en {elapsed:.2f}s, "
+          f"{not_found} événements non trouvés")
+    if cache is not None:
+        print(f"Cache : {cache.hits} hits, {cache.misses} misses")
+        cache.close()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import re
+import threading
+import urllib.parse
+from os.path import isfile
+from time import perf_counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+
+from geocode_cache import GeocodeCache
+from gazetteer import Gazetteer, GAZETTEER_FILE
+
+INPUT_FILE = "event_without_coordinates.json"
+OUTPUT_FILE = "event_with_coordinates.json"
+NOT_FOUND_FILE = "not_found_places.json"
+DEFAULT_CASCADE = ["gazetteer", "nominatim", "geonames"]
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEONAMES_URL = "https://www.geonames.org/search.html"
+TIMEOUT = (5, 30)  # secondes : connexion, lecture
+HEADERS = {
+    "User-Agent": "Nominatim-Test-Koa/1.0 (+https://www.solidarite-logement.org)",
+    "Accept-Language": "fr",
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str, pool_size: int = 8) -> requests.Session:
+    """Une session keep-alive par hôte, partagée entre les threads."""
+    host = urllib.parse.urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+class TransientError(RuntimeError):
+    """Échec temporaire (refus, quota, délai dépassé) : le lieu doit être retenté, jamais noté absent."""
+
+
+def fetch(url: str, params: dict) -> requests.Response:
+    try:
+        return get_session(url).get(url, params=params, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        # délai dépassé ou connexion perdue : un thread du runner ne reste jamais bloqué
+        raise TransientError(f"{urllib.parse.urlsplit(url).netloc} : {e}") from e
+
+
+def dms_to_decimal(dms):
+    match = re.match(r"([NSEW])\s*(\d+)°\s*(\d+)′\s*(\d+)''", dms)
+    if not match:
+        raise ValueError(f"Format DMS incorrect: {dms}")
+    direction, deg, minutes, seconds = match.groups()
+    deg = int(deg)
+    minutes = int(minutes)
+    seconds = int(seconds)
+    decimal = deg + minutes/60 + seconds/3600
+    if direction in ['S', 'W']:
+        decimal *= -1
+    return decimal
+
+
+class GazetteerProvider:
+    name = "gazetteer"
+    cacheable = False
+
+    def __init__(self, path: str = GAZETTEER_FILE):
+        self.gazetteer = Gazetteer.load(path) if isfile(path) else None
+
+    def lookup(self, place: str) -> tuple:
+        if self.gazetteer is None:
+            return None, None
+        return self.gazetteer.resolve(place), None
+
+
+class NominatimProvider:
+    name = "nominatim"
+    cacheable = True
+
+    def lookup(self, place: str) -> tuple:
+        response = fetch(NOMINATIM_URL, {"q": place, "format": "json"})
+        if response.status_code == 403:
+            print("=== Contenu renvoyé ===")
+            print(response.text[:500])
+            raise TransientError(f"Nominatim a refusé la requête pour {place}")
+        if response.status_code != 200:
+            raise TransientError(f"Nominatim : {response.status_code} pour {place}")
+        data = response.json()
+        if data:
+            return (float(data[0]["lat"]), float(data[0]["lon"])), data[0]
+        return None, None
+
+
+class GeonamesProvider:
+    name = "geonames"
+    cacheable = True
+    # seules les lignes de tableau nous intéressent, le reste de la page n'est pas construit
+    strainer = SoupStrainer("tr")
+
+    def lookup(self, place: str) -> tuple:
+        response = fetch(GEONAMES_URL, {"q": place, "country": ""})
+        if response.status_code != 200:
+            raise TransientError(f"Error fetching data for {place}: {response.status_code}")
+        soup = BeautifulSoup(response.text, "html.parser", parse_only=self.strainer)
+        for tr in soup.find_all("tr"):
+            tds = tr.find_all("td")
+            if len(tds) == 6:
+                lat = tds[-2].get_text(strip=True)
+                lon = tds[-1].get_text(strip=True)
+                raw = [td.get_text(" ", strip=True) for td in tds]
+                return (dms_to_decimal(lat), dms_to_decimal(lon)), raw
+        return None, None
+
+
+PROVIDERS = {
+    "gazetteer": GazetteerProvider,
+    "nominatim": NominatimProvider,
+    "geonames": GeonamesProvider,
+}
+
+
+class ProviderStats:
+    """Appels réels et lectures du cache comptés à part : chaque taux a son propre dénominateur."""
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.cached = 0
+        self.cached_hits = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        rate = self.hits / self.calls * 100 if self.calls else 0
+        cached_rate = self.cached_hits / self.cached * 100 if self.cached else 0
+        avg = self.seconds / self.calls * 1000 if self.calls else 0
+        return (f"{self.calls} appels, {self.hits} trouvés ({rate:.1f}%), "
+                f"{self.cached} depuis le cache, {self.cached_hits} trouvés ({cached_rate:.1f}%), "
+                f"{self.errors} erreurs, {self.seconds:.2f}s au total, {avg:.1f}ms/appel")
+
+
+class Geocoder:
+    """
+    Cascade de providers : le moins coûteux est essayé en premier, on passe
+    au suivant quand le lieu n'est pas trouvé (ou en cas d'erreur).
+    """
+    def __init__(self, cascade: list = DEFAULT_CASCADE, cache: GeocodeCache | None = None):
+        self.providers = [PROVIDERS[name]() for name in cascade]
+        self.cache = cache
+        self.stats = {p.name: ProviderStats() for p in self.providers}
+        self._lock = threading.Lock()
+
+    def _lookup(self, provider, place: str) -> tuple | None:
+        stats = self.stats[provider.name]
+        if provider.cacheable and self.cache is not None:
+            cached = self.cache.get(provider.name, place)
+            if cached is not None:
+                with self._lock:
+                    stats.cached += 1
+                    stats.cached_hits += cached.hit
+                return cached.coords
+        start = perf_counter()
+        try:
+            coords, raw = provider.lookup(place)
+        except Exception as e:
+            print(f"[{provider.name}] {e}")
+            with self._lock:
+                stats.calls += 1
+                stats.errors += 1
+                stats.seconds += perf_counter() - start
+            return None
+        with self._lock:
+            stats.calls += 1
+            stats.hits += coords is not None
+            stats.seconds += perf_counter() - start
+        if provider.cacheable and self.cache is not None:
+            self.cache.put(provider.name, place, coords, raw=raw)
+        return coords
+
+    def geocode(self, place: str) -> tuple | None:
+        for provider in self.providers:
+            coords = self._lookup(provider, place)
+            if coords:
+                return coords
+        return None
+
+    def report(self):
+        for name, stats in self.stats.items():
+            print(f"{name:>10} : {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", default=INPUT_FILE)
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("-c", "--cascade", default=",".join(DEFAULT_CASCADE),
+                        help="providers séparés par des virgules, dans l'ordre d'essai")
+    args = parser.parse_args()
+
+    if not isfile(args.file):
+        parser.exit(84, "The file doesn't exist\n")
+    with open(args.file, "r", encoding="utf-8") as fd:
+        data = json.load(fd)
+
+    out_dt = []
+    none_file = []
+    with GeocodeCache() as cache:
+        geocoder = Geocoder(args.cascade.split(","), cache)
+        for entry in data:
+            coord = geocoder.geocode(entry["place"])
+            if coord:
+                out_dt.append({
+                    **entry,
+                    "latitude": coord[0],
+                    "longitude": coord[1]
+                })
+            else:
+                print("Not found:", entry["place"])
+                none_file.append(entry)
+        geocoder.report()
+    with open(args.output, "w", encoding="utf-8") as fout:
+        json.dump(out_dt, fout, ensure_ascii=False, indent=4)
+    with open(NOT_FOUND_FILE, "w", encoding="utf-8") as fout:
+        json.dump(none_file, fout, ensure_ascii=False, indent=4)
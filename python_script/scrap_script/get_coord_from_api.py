@@ -1,87 +1,60 @@
-import requests
-from bs4 import BeautifulSoup
 import json
-import urllib.parse
-import re
+from os.path import isfile
+from geocode_cache import GeocodeCache
+from gazetteer import Gazetteer, GAZETTEER_FILE
+from geocoder import NominatimProvider, TransientError
 
 INPUT_FILE = "event_without_coordinates.json"
 OUTPUT_FILE = "event_with_coordinates.json"
 NOT_FOUND_FILE = "not_found_places.json"
 
-fd = open(INPUT_FILE, "r", encoding="utf-8")
-data = json.load(fd)
-with open(OUTPUT_FILE, "r", encoding="utf-8") as fout:
-    out_dt = json.load(fout)
-
-
-def dms_to_decimal(dms):
-    match = re.match(r"([NSEW])\s*(\d+)°\s*(\d+)′\s*(\d+)''", dms)
-    if not match:
-        raise ValueError(f"Format DMS incorrect: {dms}")
-    direction, deg, minutes, seconds = match.groups()
-    deg = int(deg)
-    minutes = int(minutes)
-    seconds = int(seconds)
-    decimal = deg + minutes/60 + seconds/3600
-    if direction in ['S', 'W']:
-        decimal *= -1
-    return decimal
-
-def getLoc(place: str) -> tuple | None:
-    query = urllib.parse.quote(place)
-    url = f"https://www.geonames.org/search.html?q={query}&country="
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Error fetching data for {place}: {response.status_code}")
-        return None
-    soup = BeautifulSoup(response.text, "html.parser")
-    trs = soup.find_all("tr")
-    for tr in trs:
-        tds = tr.find_all("td")
-        if len(tds) == 6:
-            lat_td = tds[-2]
-            lon_td = tds[-1]
-            lat = lat_td.get_text(strip=True)
-            lon = lon_td.get_text(strip=True)
-            return dms_to_decimal(lat), dms_to_decimal(lon)
-    return None
-
-def get_coords(place) -> tuple | None:
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": place, "format": "json"}
-    headers = {
-        "User-Agent": "Nominatim-Test-Koa/1.0 (+https://www.solidarite-logement.org)",
-        "Accept-Language": "fr",
-    }
-    response = requests.get(url, params=params, headers=headers)
-    if response.status_code == 403:
-        print("=== Contenu renvoyé ===")
-        print(response.text[:500])
-        return None
-    data = response.json()
-    if data:
-        lat = data[0]["lat"]
-        lon = data[0]["lon"]
-        return float(lat), float(lon)
-    return None
-
-
-none_file = []
-for entry in data:
-    place = entry["place"]
-    coord = get_coords(place)
-    if coord:
-        out_dt.append({
-            **entry,
-            "latitude": coord[0],
-            "longitude": coord[1]
-        })
-    else:
-        print("Not found:", place)
-        none_file.append(entry)
-with open(OUTPUT_FILE, "w", encoding="utf-8") as fout:
-    json.dump(out_dt, fout, ensure_ascii=False, indent=4)
-with open(NOT_FOUND_FILE, "w", encoding="utf-8") as fout:
-    json.dump(none_file, fout, ensure_ascii=False, indent=4)
-
-fd.close()
+nominatim = NominatimProvider()
+
+
+def get_coords(place, cache: GeocodeCache | None = None) -> tuple | None:
+    if cache is not None:
+        cached = cache.get("nominatim", place)
+        if cached is not None:
+            return cached.coords
+    # TransientError (refus, quota, délai) remonte à l'appelant : rien n'est
+    # mis en cache ni journalisé, le lieu sera retenté
+    coords, raw = nominatim.lookup(place)
+    if cache is not None:
+        cache.put("nominatim", place, coords, raw=raw)
+    return coords
+
+
+if __name__ == "__main__":
+    with open(INPUT_FILE, "r", encoding="utf-8") as fd:
+        data = json.load(fd)
+    with open(OUTPUT_FILE, "r", encoding="utf-8") as fout:
+        out_dt = json.load(fout)
+
+    # index local construit avec gazetteer.py, consulté avant Nominatim
+    gazetteer = Gazetteer.load(GAZETTEER_FILE) if isfile(GAZETTEER_FILE) else None
+
+    none_file = []
+    with GeocodeCache() as cache:
+        for entry in data:
+            place = entry["place"]
+            coord = gazetteer.resolve(place) if gazetteer else None
+            if not coord:
+                try:
+                    coord = get_coords(place, cache)
+                except TransientError as e:
+                    print(e)
+                    coord = None
+            if coord:
+                out_dt.append({
+                    **entry,
+                    "latitude": coord[0],
+                    "longitude": coord[1]
+                })
+            else:
+                print("Not found:", place)
+                none_file.append(entry)
+        print(f"Cache : {cache.hits} hits, {cache.misses} misses")
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as fout:
+        json.dump(out_dt, fout, ensure_ascii=False, indent=4)
+    with open(NOT_FOUND_FILE, "w", encoding="utf-8") as fout:
+        json.dump(none_file, fout, ensure_ascii=False, indent=4)
@@ -1,68 +1,53 @@
-import requests
-from bs4 import BeautifulSoup
 import json
-import urllib.parse
+from geocode_cache import GeocodeCache
+from geocoder import GeonamesProvider, TransientError
 
 INPUT_FILE = "merged_output.json"
 OUTPUT_FILE = "merged_with_coordinate.json"
 NOT_FOUND_FILE = "not_found_places.json"
 
-fd = open(INPUT_FILE, "r", encoding="utf-8")
-data = json.load(fd)
-
-import re
-
-def dms_to_decimal(dms):
-    match = re.match(r"([NSEW])\s*(\d+)°\s*(\d+)′\s*(\d+)''", dms)
-    if not match:
-        raise ValueError(f"Format DMS incorrect: {dms}")
-    direction, deg, minutes, seconds = match.groups()
-    deg = int(deg)
-    minutes = int(minutes)
-    seconds = int(seconds)
-    decimal = deg + minutes/60 + seconds/3600
-    if direction in ['S', 'W']:
-        decimal *= -1
-    return decimal
-
-def getLoc(place: str) -> tuple | None:
-    query = urllib.parse.quote(place)
-    url = f"https://www.geonames.org/search.html?q={query}&country="
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Error fetching data for {place}: {response.status_code}")
-        return None
-    soup = BeautifulSoup(response.text, "html.parser")
-    trs = soup.find_all("tr")
-    for tr in trs:
-        tds = tr.find_all("td")
-        if len(tds) == 6:
-            lat_td = tds[-2]
-            lon_td = tds[-1]
-            lat = lat_td.get_text(strip=True)
-            lon = lon_td.get_text(strip=True)
-            return dms_to_decimal(lat), dms_to_decimal(lon)
-    return None
-
-print(getLoc("Lourdes (france)"))
-
-coord_file = []
-none_file = []
-for entry in data:
-    place = entry["place"]
-    coord = getLoc(place)
-    if coord:
-        coord_file.append({
-            **entry,
-            "latitude": coord[0],
-            "longitude": coord[1]
-        })
-    else:
-        print("Not found:", place)
-        none_file.append(entry)
-with open(OUTPUT_FILE, "w", encoding="utf-8") as fout:
-    json.dump(coord_file, fout, ensure_ascii=False, indent=4)
-with open(NOT_FOUND_FILE, "w", encoding="utf-8") as fout:
-    json.dump(none_file, fout, ensure_ascii=False, indent=4)
-
-fd.close()
+geonames = GeonamesProvider()
+
+
+def getLoc(place: str, cache: GeocodeCache | None = None) -> tuple | None:
+    if cache is not None:
+        cached = cache.get("geonames", place)
+        if cached is not None:
+            return cached.coords
+    # TransientError (refus, quota, délai) remonte à l'appelant : rien n'est
+    # mis en cache ni journalisé, le lieu sera retenté
+    coords, raw = geonames.lookup(place)
+    if cache is not None:
+        cache.put("geonames", place, coords, raw=raw)
+    return coords
+
+
+if __name__ == "__main__":
+    with open(INPUT_FILE, "r", encoding="utf-8") as fd:
+        data = json.load(fd)
+
+    coord_file = []
+    none_file = []
+    with GeocodeCache() as cache:
+        print(getLoc("Lourdes (france)", cache))
+        for entry in data:
+            place = entry["place"]
+            try:
+                coord = getLoc(place, cache)
+            except TransientError as e:
+                print(e)
+                coord = None
+            if coord:
+                coord_file.append({
+                    **entry,
+                    "latitude": coord[0],
+                    "longitude": coord[1]
+                })
+            else:
+                print("Not found:", place)
+                none_file.append(entry)
+        print(f"Cache : {cache.hits} hits, {cache.misses} misses")
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as fout:
+        json.dump(coord_file, fout, ensure_ascii=False, indent=4)
+    with open(NOT_FOUND_FILE, "w", encoding="utf-8") as fout:
+        json.dump(none_file, fout, ensure_ascii=False, indent=4)
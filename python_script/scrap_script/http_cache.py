@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+from time import time
+
+import requests
+
+CACHE_FILE = "http_cache.sqlite"
+TIMEOUT = (5, 30)  # secondes : connexion, lecture ; une connexion bloquée ne fige pas le pool
+
+
+class HttpCache:
+    """
+    Cache des pages téléchargées avec leurs en-têtes ETag/Last-Modified.
+    Les requêtes suivantes sont conditionnelles : sur un 304 on réutilise le
+    corps en cache, et les lignes déjà extraites de la page si elles existent.
+    """
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self.changed = []
+        self.unchanged = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                rows TEXT,
+                fetched REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _row(self, url: str):
+        with self._lock:
+            return self._db.execute(
+                "SELECT etag, last_modified, body, rows FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def fetch(self, url: str, session=requests) -> tuple:
+        """Retourne (html, changed)."""
+        cached = self._row(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = session.get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self.unchanged.append(url)
+            return cached[2], False
+        response.raise_for_status()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, NULL, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 response.text, time())
+            )
+            self._db.commit()
+            self.changed.append(url)
+        return response.text, True
+
+    def get_rows(self, url: str) -> list | None:
+        cached = self._row(url)
+        if cached is None or cached[3] is None:
+            return None
+        return json.loads(cached[3])
+
+    def put_rows(self, url: str, rows: list):
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET rows = ? WHERE url = ?",
+                (json.dumps(rows, ensure_ascii=False), url)
+            )
+            self._db.commit()
+
+    def report(self):
+        print(f"{len(self.changed)} pages modifiées, {len(self.unchanged)} inchangées")
+        for url in self.changed:
+            print(f"  modifiée : {url}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,18 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from bs4 import BeautifulSoup
 import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import HttpCache, TIMEOUT
+from table_extract import extract_rows, parse_fields
 
 URL = "https://www.miraclehunter.com/marian_apparitions/approved_apparitions/apparitions_1000-1099.html"
 BASEURL = "https://www.miraclehunter.com/marian_apparitions/approved_apparitions/"
 EXPORT_FILE = "scrapv2.json"
+CHANGED_FILE = "scrapv2_changed.json" # lignes des seules pages modifiées depuis le dernier lancement
+MAX_CONNECTIONS = 4 # connexions simultanées vers miraclehunter.com
 
 def rmEndLine(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
@@ -66,8 +73,16 @@ def parseLine(text: str) -> list[str]:
     data["description"] = rmEndLine(" ".join(description))
     return data
 
-def scrape_table(url):
-    html = requests.get(url).text
+def make_session(max_connections: int = MAX_CONNECTIONS) -> requests.Session:
+    # pool_block : jamais plus de max_connections connexions ouvertes vers l'hôte
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def find_rows(html: str) -> list:
+    # extraction d'origine, gardée comme référence pour bench_scrape.py
     soup = BeautifulSoup(html, "html.parser")
     all_tables = soup.find_all("table")
     target_table = None
@@ -96,8 +111,21 @@ def scrape_table(url):
                 results.append(row)
     return results[1:]
 
-def get_select(url):
-    html = requests.get(url).text
+def scrape_table(url, session=requests, cache: HttpCache | None = None, fast: bool = True):
+    if cache is not None:
+        html, changed = cache.fetch(url, session)
+        rows = None if changed else cache.get_rows(url)
+        if rows is not None:
+            return rows
+    else:
+        html = session.get(url, timeout=TIMEOUT).text
+    rows = extract_rows(html, 3, BASEURL)[1:] if fast else find_rows(html)
+    if cache is not None:
+        cache.put_rows(url, rows)
+    return rows
+
+def get_select(url, session=requests):
+    html = session.get(url, timeout=TIMEOUT).text
     soup = BeautifulSoup(html, "html.parser")
     select: BeautifulSoup = soup.find("select")
     options = select.find_all("option")
@@ -106,14 +134,36 @@ def get_select(url):
         result.append(opt.get("value", "").strip())
     return result[1:]
 
+def crawl(urls: list, session, workers: int = MAX_CONNECTIONS, cache: HttpCache | None = None):
+    """
+    Télécharge et parse les pages en parallèle. map() rend les résultats
+    dans l'ordre des urls, la sortie reste donc identique au mode séquentiel.
+    """
+    if workers <= 1:
+        return [scrape_table(url, session, cache) for url in urls]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda url: scrape_table(url, session, cache), urls))
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-w", "--workers", type=int, default=MAX_CONNECTIONS,
+                        help="pages traitées en parallèle (1 = séquentiel)")
+    parser.add_argument("--no-cache", action="store_true", help="tout retélécharger")
+    args = parser.parse_args()
+
     json_data = []
-    end_urls = get_select(URL)[:-1]
-    for end in end_urls:
-        print(BASEURL+end)
-        data = scrape_table(BASEURL+end)
+    session = make_session(max(1, args.workers))
+    end_urls = get_select(URL, session)[:-1]
+    urls = [BASEURL+end for end in end_urls]
+    for url in urls:
+        print(url)
+    cache = None if args.no_cache else HttpCache()
+    changed_data = []
+    pages = crawl(urls, session, args.workers, cache)
+    changed = set(cache.changed) if cache is not None else set(urls)
+    for url, data in zip(urls, pages):
         for row in data:
-            parse = parseLine(row[2])
+            parse = parse_fields(row[2])
             newList = {
                 "date": rmEndLine(row[0]),
                 "place": rmEndLine(row[1]),
@@ -121,7 +171,16 @@ if __name__ == "__main__":
                 "links": row[3:]
             }
             json_data.append(newList)
-
-
+            if url in changed:
+                changed_data.append(newList)
+    if cache is not None:
+        cache.report()
+        cache.close()
+
+    # scrapv2.json reste complet : merge.py et event_merge.py le relisent en
+    # entier. Seules les lignes des pages modifiées sont réémises à part.
     with open(EXPORT_FILE, "w", encoding="utf-8") as f:
         json.dump(json_data, f, ensure_ascii=False, indent=4)
+    with open(CHANGED_FILE, "w", encoding="utf-8") as f:
+        json.dump(changed_data, f, ensure_ascii=False, indent=4)
+    print(f"{len(changed_data)}/{len(json_data)} lignes issues de pages modifiées -> {CHANGED_FILE}")
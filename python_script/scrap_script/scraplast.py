@@ -2,16 +2,20 @@ import requests
 import json
 from bs4 import BeautifulSoup
 import re
+import argparse
+from http_cache import HttpCache, TIMEOUT
+from table_extract import extract_rows
 
 URL = "https://www.miraclehunter.com/marian_apparitions/approved_apparitions/index.html"
 BASEURL = "https://www.miraclehunter.com/marian_apparitions/approved_apparitions/"
 EXPORT_FILE = "scrapLastv2.json"
+CHANGED_FILE = "scrapLastv2_changed.json" # vide si la page n'a pas changé depuis le dernier lancement
 
 def rmEndLine(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
-def scrape_table(url):
-    html = requests.get(url).text
+def find_rows(html: str) -> list:
+    # extraction d'origine, gardée comme référence pour bench_scrape.py
     soup = BeautifulSoup(html, "html.parser")
 
     all_tables = soup.find_all("table")
@@ -41,10 +45,32 @@ def scrape_table(url):
                 results.append(row)
     return results[2:]
 
+def scrape_table(url, cache: HttpCache | None = None, fast: bool = True):
+    if cache is not None:
+        html, changed = cache.fetch(url)
+        rows = None if changed else cache.get_rows(url)
+        if rows is not None:
+            return rows
+    else:
+        html = requests.get(url, timeout=TIMEOUT).text
+    rows = extract_rows(html, 4, BASEURL)[2:] if fast else find_rows(html)
+    if cache is not None:
+        cache.put_rows(url, rows)
+    return rows
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-cache", action="store_true", help="tout retélécharger")
+    args = parser.parse_args()
+
     json_data = []
     print(URL)
-    data = scrape_table(URL)
+    cache = None if args.no_cache else HttpCache()
+    data = scrape_table(URL, cache)
+    changed = cache is None or URL in cache.changed
+    if cache is not None:
+        cache.report()
+        cache.close()
     for row in data:
         newList = {
             "date": rmEndLine(row[0]),
@@ -58,3 +84,5 @@ if __name__ == "__main__":
 
     with open(EXPORT_FILE, "w", encoding="utf-8") as f:
         json.dump(json_data, f, ensure_ascii=False, indent=4)
+    with open(CHANGED_FILE, "w", encoding="utf-8") as f:
+        json.dump(json_data if changed else [], f, ensure_ascii=False, indent=4)
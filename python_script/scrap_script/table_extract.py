@@ -0,0 +1,111 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+FIELDS = ("visionary", "title", "feast", "commemorated", "source")
+# une seule passe : repère le début de chaque champ, y compris quand
+# plusieurs champs se suivent sur la même ligne
+FIELD_RE = re.compile(r"(?=(visionar(?:y|ies)|title|feast|commemorated|source):)", re.IGNORECASE)
+SPACES_RE = re.compile(r"\s+")
+DESCRIPTION_SKIP = ("visionary:", "visionaries:", "title:", "source:", "feast:", "commemorated:")
+
+_only_tables = SoupStrainer("table")
+
+
+def rmEndLine(text: str) -> str:
+    return SPACES_RE.sub(" ", text).strip()
+
+
+def parse_fields(text: str) -> dict:
+    """Équivalent de parseLine() en une seule recherche compilée."""
+    data = dict.fromkeys(("visionary", "title", "description", "feast", "commemorated", "source"), "")
+    seen = set()
+    for match in FIELD_RE.finditer(text):
+        key = match.group(1).lower()
+        key = "visionary" if key.startswith("visionar") else key
+        if key in seen:
+            continue
+        seen.add(key)
+        start = match.end(1) + 1
+        while start < len(text) and text[start].isspace():
+            start += 1
+        end = len(text) if key == "source" else text.find("\n", start)
+        data[key] = rmEndLine(text[start:end if end != -1 else len(text)])
+        if len(seen) == len(FIELDS):
+            break
+
+    lines = []
+    for line in text.strip().split("\n"):
+        stripped = line.strip()
+        if stripped and not stripped.lower().startswith(DESCRIPTION_SKIP):
+            lines.append(stripped)
+    data["description"] = rmEndLine(" ".join(lines))
+    return data
+
+
+def _full_url(href: str, baseurl: str) -> str:
+    return href if href.startswith("http") else baseurl + href
+
+
+def _rows_lxml(html: str, ncols: int, baseurl: str, min_rows: int) -> list | None:
+    doc = lxml.html.fromstring(html)
+    tables = doc.xpath(f"//table[count(.//tr[count(.//td) = {ncols}]) >= {min_rows}][1]")
+    if not tables:
+        return None
+    results = []
+    for tr in tables[0].iter("tr"):
+        tds = tr.findall(".//td")
+        if len(tds) != ncols:
+            continue
+        row = [td.text_content() for td in tds]
+        if "Contact The Miracle Hunter" in row:
+            continue
+        row.extend(_full_url(a.get("href"), baseurl) for a in tr.iter("a") if a.get("href", "") != "")
+        results.append(row)
+    return results
+
+
+def _rows_soup(html: str, ncols: int, baseurl: str, min_rows: int) -> list | None:
+    # seuls les <table> sont construits, et le comptage s'arrête dès min_rows lignes trouvées
+    soup = BeautifulSoup(html, "html.parser", parse_only=_only_tables)
+    target_table = None
+    for table in soup.find_all("table"):
+        count = 0
+        for tr in table.find_all("tr"):
+            count += len(tr.find_all("td")) == ncols
+            if count >= min_rows:
+                target_table = table
+                break
+        if target_table:
+            break
+    if not target_table:
+        return None
+    results = []
+    for tr in target_table.find_all("tr"):
+        tds = tr.find_all("td")
+        if len(tds) != ncols:
+            continue
+        row = [td.get_text(strip=False) for td in tds]
+        if "Contact The Miracle Hunter" in row:
+            continue
+        row.extend(_full_url(a.get("href", ""), baseurl) for a in tr.find_all("a") if a.get("href", "") != "")
+        results.append(row)
+    return results
+
+
+def extract_rows(html: str, ncols: int, baseurl: str, min_rows: int = 5, use_lxml: bool = True) -> list:
+    """
+    Lignes à `ncols` cellules du premier tableau qui en contient au moins
+    `min_rows`, suivies des liens de la ligne. Utilise lxml s'il est installé.
+    """
+    if use_lxml and lxml is not None:
+        results = _rows_lxml(html, ncols, baseurl, min_rows)
+    else:
+        results = _rows_soup(html, ncols, baseurl, min_rows)
+    if results is None:
+        raise RuntimeError("Impossible de trouver le tableau final !")
+    return results
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import re
+import unicodedata
+
+LABELS_FILE = "../utils/meteo_bible.csv"
+
+# racines (sans accents) propres à chaque condition, en expressions régulières
+# ancrées en début de mot. Les mots trop courants (ciel, eaux, blanc, matin,
+# coucher, agiter...) sont exclus : ils faisaient passer une bonne part du
+# corpus sans rien apporter de sûr. Vérifier le rappel avec ce script après
+# chaque modification.
+LEMMAS = {
+    "rain": ["pluie", "pluvi", "pleuv", "pleut", "averse", "ondee", "bruine", "rosee", "deluge",
+             "inond", "cataracte", "nuage", "nuee"],
+    "snow": ["neige", "neig", "flocon", "grele", "frimas", "givre", "glace", "verglas", "hiver"],
+    "wind": [r"vents?\b", "souffl", "bourrasque", "ouragan", "tourbillon", r"brises?\b", "rafale",
+             "tempete", "aquilon", "sirocco"],
+    "fog": ["brouillard", "brume", "nuee", "nuage", "vapeur", "fumee", "obscur", "tenebre"],
+    "storm": ["orage", "tempete", "tonnerre", "tonn", "eclair", "foudre", "grele", "ouragan",
+              "tourmente", "grondement", "deluge", "dechain", "cataclysm", "tremblement de terre"],
+    "night": ["nuit", "nocturne", "soir", "tenebre", "obscur", "lune", "etoile", "minuit",
+              "coucher du soleil", "crepuscule", "aurore", r"aube\b", "point du jour", "sommeil",
+              "endorm", "reveil", "eveill", "lampe", "flambeau", r"coqs?\b", "songe",
+              "tombee du jour", "se faisait tard"],
+}
+
+PATTERNS = {
+    key: re.compile(r"\b(?:" + "|".join(sorted(words, key=len, reverse=True)) + ")")
+    for key, words in LEMMAS.items()
+}
+ANY_PATTERN = re.compile(r"\b(?:" + "|".join(sorted({w for words in LEMMAS.values() for w in words},
+                                                  key=len, reverse=True)) + ")")
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower().replace("’", "'"))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def is_candidate(text: str) -> bool:
+    """Faux si le verset est un négatif évident (aucun mot-clé météo ou nocturne)."""
+    return ANY_PATTERN.search(fold(text)) is not None
+
+
+def candidate_flags(text: str) -> dict:
+    folded = fold(text)
+    return {key: pattern.search(folded) is not None for key, pattern in PATTERNS.items()}
+
+
+def evaluate(rows: list) -> dict:
+    """
+    rows : dictionnaires avec "texte" et les six colonnes booléennes ("True"/"False").
+    Retourne précision et rappel par condition, et le rappel global du filtre.
+    La précision d'une condition se mesure sur meteo_bible.csv (les versets
+    étiquetés pour les autres conditions y sont ses négatifs). Celle du rejet
+    global non : le fichier ne contient aucun verset sans condition, on ne
+    peut donc pas savoir combien de versets écartés sont de vrais négatifs.
+    """
+    found = {key: 0 for key in LEMMAS}
+    labelled = {key: 0 for key in LEMMAS}
+    flagged = {key: 0 for key in LEMMAS}
+    positives = kept = 0
+    for row in rows:
+        flags = candidate_flags(row["texte"])
+        labels = {key: str(row[key]) == "True" for key in LEMMAS}
+        if any(labels.values()):
+            positives += 1
+            kept += any(flags.values())
+        for key in LEMMAS:
+            labelled[key] += labels[key]
+            flagged[key] += flags[key]
+            found[key] += labels[key] and flags[key]
+    report = {key: {"precision": found[key] / flagged[key] if flagged[key] else 0.0,
+                    "recall": found[key] / labelled[key] if labelled[key] else 0.0}
+              for key in LEMMAS}
+    report["filter_recall"] = kept / positives if positives else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-l", "--labels", default=LABELS_FILE, help="versets étiquetés (meteo_bible.csv)")
+    parser.add_argument("-c", "--corpus", help="corpus complet à filtrer (CSV '|' avec une colonne texte)")
+    parser.add_argument("-m", "--misses", action="store_true", help="afficher les versets étiquetés non retenus")
+    args = parser.parse_args()
+
+    with open(args.labels, "r", encoding="utf-8") as fd:
+        rows = list(csv.DictReader(fd, delimiter="|"))
+    report = evaluate(rows)
+    print(f"{len(rows)} versets étiquetés")
+    for key in LEMMAS:
+        print(f"{key:>6} : précision {report[key]['precision']:6.1%}, rappel {report[key]['recall']:6.1%}")
+    print(f"Versets positifs conservés par le filtre : {report['filter_recall']:.1%}")
+    if args.misses:
+        for row in rows:
+            if not is_candidate(row["texte"]):
+                labels = ",".join(key for key in LEMMAS if str(row[key]) == "True")
+                print(f"  [{labels}] {row['bible reference']} {row['texte']}")
+
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as fd:
+            texts = [row["texte"] for row in csv.DictReader(fd, delimiter="|")]
+        sent = sum(1 for text in texts if is_candidate(text))
+        print(f"Corpus : {sent}/{len(texts)} versets avec mot-clé, "
+              f"{len(texts) - sent} reportés (toujours à envoyer au modèle)")
@@ -26,10 +26,10 @@ mkdir -p "$TEMP_DIR"
 ORIGINAL_SIZE=$(du -h "$INPUT" | cut -f1)
 echo -e "${GREEN}Taille originale: $ORIGINAL_SIZE${NC}"
 
-echo -e "\n${BLUE}[1/6] Analyse du fichier...${NC}"
+echo -e "\n${BLUE}[1/5] Analyse du fichier...${NC}"
 gdalinfo "$INPUT" | grep -E "(Size|Pixel Size|Origin|Upper|Lower|Coordinate System)"
 
-echo -e "\n${BLUE}[2/6] Reprojection + compression WebP (qualité réduite)...${NC}"
+echo -e "\n${BLUE}[2/5] Reprojection + compression WebP (qualité réduite)...${NC}"
 gdalwarp -t_srs EPSG:3857 \
     -r bilinear \
     -co COMPRESS=WEBP \
@@ -42,44 +42,27 @@ gdalwarp -t_srs EPSG:3857 \
 OPTIMIZED_SIZE=$(du -h "$TEMP_DIR/optimized.tif" | cut -f1)
 echo -e "${GREEN}Après optimisation: $OPTIMIZED_SIZE${NC}"
 
-echo -e "\n${BLUE}[3/6] Création des overviews...${NC}"
+echo -e "\n${BLUE}[3/5] Création des overviews...${NC}"
 gdaladdo -r average "$TEMP_DIR/optimized.tif" 2 4 8 16 32
 
-echo -e "\n${BLUE}[4/6] Génération des tiles PNG (temporaire)...${NC}"
+echo -e "\n${BLUE}[4/5] Génération des tiles WebP (qualité 65, en parallèle)...${NC}"
 
 if [ -d "$OUTPUT_DIR" ]; then
     echo "Suppression de l'ancien dossier tiles..."
     rm -rf "$OUTPUT_DIR"
 fi
 
-gdal2tiles.py \
+# lecture des fenêtres du GeoTIFF, tuiles transparentes ignorées, encodage WebP sur tous les coeurs
+python3 "$(dirname "$0")/../python_script/conv_script/tile_raster.py" \
+    "$TEMP_DIR/optimized.tif" \
+    -o "$OUTPUT_DIR" \
     -z 6-13 \
-    --xyz \
-    --tilesize=256 \
-    --processes=8 \
-    --resampling=average \
-    -w none \
-    "$TEMP_DIR/optimized.tif" "$OUTPUT_DIR"
-
-echo -e "\n${BLUE}[5/6] Conversion PNG → WebP (qualité 65)...${NC}"
-
-if ! command -v cwebp &> /dev/null; then
-    echo -e "${RED}Erreur: cwebp n'est pas installé.${NC}"
-    echo "Installe-le avec: sudo apt install webp"
-    exit 1
-fi
-
-find "$OUTPUT_DIR" -name "*.png" -type f | while read file; do
-    cwebp -quiet -q 65 "$file" -o "${file%.png}.webp"
-    if [ $? -eq 0 ]; then
-        rm "$file"
-    fi
-done
+    -q 65 \
+    -r average
 
 echo -e "${GREEN}Conversion terminée.${NC}"
 
-echo -e "\n${BLUE}[6/6] Nettoyage...${NC}"
-find "$OUTPUT_DIR" -type f -size -1k -delete
+echo -e "\n${BLUE}[5/5] Nettoyage...${NC}"
 rm -rf "$TEMP_DIR"
 
 echo -e "\n${GREEN}=== Résumé ===${NC}"